@@ -6,9 +6,40 @@ import argparse
 import json
 import sys
 from pathlib import Path
+from typing import Any
 
-from financial_data_lab.core.hashing import receipt_id_from_sha256, sha256_file
-from financial_data_lab.store import artifacts, events, export, layout, manifests, ocr, pdf_pages
+from financial_data_lab.core.jsoncanon import canonical_json_dumps
+from financial_data_lab.store import catalog, export, layout, migrate, preprocess, projections
+from financial_data_lab.store.store import Store, StoreError
+
+
+def _add_catalog_filters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--media-type")
+    parser.add_argument("--min-size", type=int, help="Minimum byte size")
+    parser.add_argument("--max-size", type=int, help="Maximum byte size")
+    parser.add_argument("--ingested-after", help="ISO timestamp, inclusive")
+    parser.add_argument("--ingested-before", help="ISO timestamp, exclusive")
+    parser.add_argument("--filename", help="Glob pattern on the original filename")
+    parser.add_argument("--ocr-status", choices=catalog.OCR_STATUSES)
+
+
+def _catalog_filters(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "media_type": args.media_type,
+        "min_size": args.min_size,
+        "max_size": args.max_size,
+        "ingested_after": args.ingested_after,
+        "ingested_before": args.ingested_before,
+        "filename": args.filename,
+        "ocr_status": args.ocr_status,
+    }
+
+
+def _selected_receipt_ids(handle: Store, args: argparse.Namespace) -> list[str] | None:
+    filters = _catalog_filters(args)
+    if all(value is None for value in filters.values()):
+        return None
+    return handle.catalog.receipt_ids(**filters)
 
 
 def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -18,15 +49,86 @@ def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     ingest_parser = subparsers.add_parser("ingest", help="Ingest a file")
     ingest_parser.add_argument("path")
     ingest_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    ingest_parser.add_argument(
+        "--warn-dupes", action="store_true", help="Warn when the image looks like a stored receipt"
+    )
 
     export_parser = subparsers.add_parser("export", help="Export data")
     export_subparsers = export_parser.add_subparsers(dest="export_command", required=True)
     export_receipts = export_subparsers.add_parser("receipts", help="Export receipts")
     export_receipts.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
     export_receipts.add_argument("--out", type=Path)
+    _add_catalog_filters(export_receipts)
+    export_ocr = export_subparsers.add_parser(
+        "ocr", help="Export OCR text as a mappable blob with an offset index"
+    )
+    export_ocr.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    export_ocr.add_argument("--out", type=Path, help="Output directory (default: <store>/exports)")
+    export_ocr.add_argument(
+        "--rebuild", action="store_true", help="Rewrite the corpus instead of appending"
+    )
 
     verify_parser = subparsers.add_parser("verify", help="Verify store integrity")
     verify_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    _add_catalog_filters(verify_parser)
+
+    query_parser = subparsers.add_parser("query", help="Query the receipt catalog as JSONL")
+    query_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    query_parser.add_argument("--limit", type=int)
+    _add_catalog_filters(query_parser)
+
+    search_parser = subparsers.add_parser("search", help="Full-text search over OCR text")
+    search_parser.add_argument("terms")
+    search_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    search_parser.add_argument("--limit", type=int, default=20)
+
+    dupes_parser = subparsers.add_parser("dupes", help="Find near-duplicate receipt images")
+    dupes_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    dupes_parser.add_argument(
+        "--max-distance", type=int, default=8, help="Maximum pHash Hamming distance"
+    )
+
+    sync_parser = subparsers.add_parser("sync", help="Copy what one store lacks from another")
+    sync_parser.add_argument("--from", dest="source", type=Path, required=True)
+    sync_parser.add_argument("--to", dest="target", type=Path, required=True)
+    sync_parser.add_argument("--workers", type=int, default=8, help="Parallel object copies")
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Record a Merkle snapshot of objects, manifests and events"
+    )
+    snapshot_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    snapshot_parser.add_argument(
+        "--fast", action="store_true", help="Reuse cached hashes of files whose size and mtime match"
+    )
+
+    diff_parser = subparsers.add_parser("diff", help="List changes since a snapshot as JSONL")
+    diff_parser.add_argument("snapshot", help="Snapshot root hash or a unique prefix")
+    diff_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    diff_parser.add_argument(
+        "--fast", action="store_true", help="Reuse cached hashes of files whose size and mtime match"
+    )
+
+    status_parser = subparsers.add_parser(
+        "status", help="Summarize receipt lifecycle status from the event log"
+    )
+    status_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    status_parser.add_argument(
+        "--list",
+        dest="list_status",
+        choices=projections.LIFECYCLE_STATUSES,
+        help="Print the receipts in this status as JSONL",
+    )
+    status_parser.add_argument("--limit", type=int)
+    status_parser.add_argument(
+        "--rebuild", action="store_true", help="Replay the whole event log first"
+    )
+
+    catalog_parser = subparsers.add_parser("catalog", help="Manage the receipt catalog")
+    catalog_subparsers = catalog_parser.add_subparsers(dest="catalog_command", required=True)
+    catalog_rebuild = catalog_subparsers.add_parser(
+        "rebuild", help="Rebuild the catalog and search index from the store"
+    )
+    catalog_rebuild.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
 
     show_parser = subparsers.add_parser("show", help="Show a receipt manifest")
     show_parser.add_argument("receipt_id")
@@ -36,83 +138,121 @@ def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     ocr_parser.add_argument("receipt_id")
     ocr_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
     ocr_parser.add_argument("--lang", default="por")
+    ocr_parser.add_argument(
+        "--preprocess", action="store_true", help="Clean up images with NumPy before OCR"
+    )
+    ocr_parser.add_argument(
+        "--preprocess-opt",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a preprocessing parameter (JSON value); implies --preprocess",
+    )
+    ocr_parser.add_argument(
+        "--words", action="store_true", help="Also store word boxes and confidences"
+    )
+
+    words_parser = subparsers.add_parser("words", help="Query word-level OCR boxes as JSONL")
+    words_parser.add_argument("receipt_id")
+    words_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    words_parser.add_argument("--page", type=int)
+    words_parser.add_argument("--region", metavar="LEFT,TOP,RIGHT,BOTTOM", help="Requires --page")
+    words_parser.add_argument(
+        "--contained", action="store_true", help="Only words fully inside --region"
+    )
+    words_parser.add_argument("--lowest", type=int, metavar="N", help="N lowest-confidence words")
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Run staged batch imports")
+    pipeline_subparsers = pipeline_parser.add_subparsers(dest="pipeline_command", required=True)
+    pipeline_run = pipeline_subparsers.add_parser(
+        "run", help="Ingest, render and OCR files concurrently"
+    )
+    pipeline_run.add_argument("inputs", nargs="+", help="Files or directories to import")
+    pipeline_run.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    pipeline_run.add_argument("--ingest-workers", type=int, default=2)
+    pipeline_run.add_argument("--render-workers", type=int, default=1)
+    pipeline_run.add_argument("--ocr-workers", type=int, default=2)
+    pipeline_run.add_argument("--queue-size", type=int, default=16, help="Capacity of each stage queue")
+    pipeline_run.add_argument("--lang", default="por")
+    pipeline_run.add_argument(
+        "--preprocess", action="store_true", help="Clean up images with NumPy before OCR"
+    )
+    pipeline_run.add_argument(
+        "--preprocess-opt",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a preprocessing parameter (JSON value); implies --preprocess",
+    )
+
+    migrate_parser = subparsers.add_parser(
+        "migrate-layout", help="Move receipts into the sharded store layout"
+    )
+    migrate_parser.add_argument("--store", type=Path, default=layout.DEFAULT_STORE)
+    migrate_parser.add_argument("--limit", type=int, help="Stop after moving this many receipts")
+    migrate_parser.add_argument("--quiet", action="store_true", help="Do not print each moved receipt")
 
     return parser.parse_args(argv)
 
 
-def _cmd_ingest(path_hint: str, store: Path) -> int:
+def _cmd_ingest(path_hint: str, store: Path, warn_dupes: bool) -> int:
     source_path = Path(path_hint)
     if not source_path.exists():
         print(f"File not found: {path_hint}", file=sys.stderr)
         return 1
-    sha256_hex, object_path, _ = artifacts.store_object(source_path, store)
-    receipt_id = receipt_id_from_sha256(sha256_hex)
-    manifest_path = manifests.write_manifest(
-        store=store,
-        sha256_hex=sha256_hex,
-        source_path=source_path,
-        path_hint=path_hint,
-        original_filename=source_path.name,
-        object_path=object_path,
-    )
-    manifest_ref = layout.relative_to_store(store, manifest_path)
-    object_ref = layout.relative_to_store(store, object_path)
-    events.append_receipt_ingested(
-        store=store,
-        receipt_id=receipt_id,
-        manifest_path=manifest_ref,
-        object_path=object_ref,
-    )
+    with Store(store) as handle:
+        receipt_id, object_path, manifest_path = handle.ingest(source_path, path_hint=path_hint)
+        if warn_dupes:
+            from financial_data_lab.store import similarity
+
+            # The receipt is already stored, so a failed check only warns.
+            try:
+                matches = similarity.duplicates_of(handle, receipt_id)
+            except (OSError, ValueError, StoreError) as exc:
+                print(f"warning: duplicate check failed: {exc}", file=sys.stderr)
+                matches = []
+            for match in matches:
+                print(
+                    f"warning: possible duplicate of {match['duplicate_of']} "
+                    f"(page {match['duplicate_page']}, distance {match['distance']})",
+                    file=sys.stderr,
+                )
     print(f"receipt_id: {receipt_id}")
     print(f"object_path: {object_path}")
     print(f"manifest_path: {manifest_path}")
     return 0
 
 
-def _cmd_export_receipts(store: Path, out_path: Path | None) -> int:
-    output_path = export.export_receipts(store, out_path)
+def _cmd_export_receipts(args: argparse.Namespace) -> int:
+    with Store(args.store) as handle:
+        receipt_ids = _selected_receipt_ids(handle, args)
+    output_path = export.export_receipts(args.store, args.out, receipt_ids)
     print(f"export_path: {output_path}")
     return 0
 
 
-def _cmd_verify(store: Path) -> int:
-    receipts_root = layout.receipts_root(store)
-    errors = 0
-    if not receipts_root.exists():
+def _cmd_export_ocr(store: Path, out_dir: Path | None, rebuild: bool) -> int:
+    from financial_data_lab.store import ocr_corpus
+
+    report = ocr_corpus.update_ocr_corpus(store, out_dir, rebuild=rebuild)
+    print(
+        f"status: ok added: {report['added']} skipped: {report['skipped']} "
+        f"records: {report['records']} text_bytes: {report['text_bytes']}"
+    )
+    print(f"text_path: {report['text_path']}")
+    print(f"index_path: {report['index_path']}")
+    return 0
+
+
+def _cmd_verify(args: argparse.Namespace) -> int:
+    store = args.store
+    if not layout.receipts_root(store).exists():
         print("No receipts found.")
         return 0
-    for manifest_path in receipts_root.glob("*/manifest.v1.json"):
-        try:
-            manifest_data = json.loads(manifest_path.read_text(encoding="utf-8"))
-        except Exception as exc:
-            print(f"Invalid JSON in {manifest_path}: {exc}", file=sys.stderr)
-            errors += 1
-            continue
-        content = manifest_data.get("content", {})
-        sha256_hex = content.get("sha256")
-        object_path_value = content.get("object_path")
-        if not object_path_value:
-            print(f"Missing object_path in {manifest_path}", file=sys.stderr)
-            errors += 1
-            continue
-        object_path = Path(object_path_value)
-        if not object_path.is_absolute():
-            object_path = store / object_path
-        if not sha256_hex:
-            print(f"Missing sha256 in {manifest_path}", file=sys.stderr)
-            errors += 1
-            continue
-        if not object_path.exists():
-            print(f"Missing object: {object_path}", file=sys.stderr)
-            errors += 1
-            continue
-        actual_hash = sha256_file(object_path)
-        if sha256_hex != actual_hash:
-            print(
-                f"Hash mismatch for {manifest_path}: expected {sha256_hex}, got {actual_hash}",
-                file=sys.stderr,
-            )
-            errors += 1
+    with Store(store) as handle:
+        errors = handle.verify(_selected_receipt_ids(handle, args))
+    for error in errors:
+        print(error, file=sys.stderr)
     if errors:
         return 1
     print("Store verification passed.")
@@ -120,32 +260,15 @@ def _cmd_verify(store: Path) -> int:
 
 
 def _cmd_show(receipt_id: str, store: Path) -> int:
-    manifest_path = layout.manifest_path(store, receipt_id)
-    if not manifest_path.exists():
-        print(f"Manifest not found: {manifest_path}", file=sys.stderr)
-        print("status: corrupted object_exists: false hash_match: false")
-        return 1
-    manifest_text = manifest_path.read_text(encoding="utf-8")
+    handle = Store(store)
     try:
-        manifest_data = json.loads(manifest_text)
-    except Exception as exc:
-        print(f"Invalid JSON in {manifest_path}: {exc}", file=sys.stderr)
+        manifest_data = handle.load_manifest(receipt_id)
+    except StoreError as exc:
+        print(exc, file=sys.stderr)
         print("status: corrupted object_exists: false hash_match: false")
         return 1
-    print(manifest_text, end="")
-    content = manifest_data.get("content", {})
-    sha256_hex = content.get("sha256")
-    object_path_value = content.get("object_path")
-    object_exists = False
-    hash_match = False
-    if object_path_value:
-        object_path = Path(object_path_value)
-        if not object_path.is_absolute():
-            object_path = store / object_path
-        object_exists = object_path.exists()
-        if object_exists and sha256_hex:
-            actual_hash = sha256_file(object_path)
-            hash_match = actual_hash == sha256_hex
+    print(canonical_json_dumps(manifest_data))
+    object_exists, hash_match = handle.check_object(receipt_id)
     print(
         "status: ok "
         f"object_exists: {str(object_exists).lower()} "
@@ -154,106 +277,254 @@ def _cmd_show(receipt_id: str, store: Path) -> int:
     return 0
 
 
-def _cmd_ocr(receipt_id: str, store: Path, lang: str) -> int:
-    manifest_path = layout.manifest_path(store, receipt_id)
-    if not manifest_path.exists():
-        print(f"Manifest not found: {manifest_path}", file=sys.stderr)
-        return 1
+def _preprocess_options(enabled: bool, options: list[str]) -> dict[str, Any] | None:
+    if not enabled and not options:
+        return None
+    overrides: dict[str, Any] = {}
+    for option in options:
+        key, _, value = option.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return preprocess.resolve_params(overrides)
+
+
+def _cmd_ocr(args: argparse.Namespace) -> int:
+    receipt_id = args.receipt_id
     try:
-        manifest_data = json.loads(manifest_path.read_text(encoding="utf-8"))
-    except Exception as exc:
-        print(f"Invalid JSON in {manifest_path}: {exc}", file=sys.stderr)
-        return 1
-    content = manifest_data.get("content", {})
-    object_path_value = content.get("object_path")
-    if not object_path_value:
-        print(f"Missing object_path in {manifest_path}", file=sys.stderr)
+        params = _preprocess_options(args.preprocess, args.preprocess_opt)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
         return 1
-    object_path = Path(object_path_value)
-    if not object_path.is_absolute():
-        object_path = store / object_path
-    if not object_path.exists():
-        print(f"Missing object: {object_path}", file=sys.stderr)
+    with Store(args.store) as handle:
+        try:
+            ocr_artifact_path, page_count = handle.write_ocr(
+                receipt_id, lang=args.lang, preprocess=params, words=args.words
+            )
+            words_path = handle.ocr_words_path(receipt_id) if args.words else None
+        except StoreError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+    ocr_ref = handle.relative(ocr_artifact_path)
+    if page_count is not None:
+        print(f"status: ok ocr_path: {ocr_ref} pages: {page_count}")
+    else:
+        print(f"status: ok ocr_path: {ocr_ref}")
+    if words_path is not None:
+        print(f"ocr_words_path: {handle.relative(words_path)}")
+    return 0
+
+
+def _cmd_words(args: argparse.Namespace) -> int:
+    if args.region is not None and args.page is None:
+        print("--region requires --page", file=sys.stderr)
         return 1
-    source = manifest_data.get("source", {})
-    media_type = source.get("media_type")
-    original_name = source.get("original_filename") or object_path.name
-    suffix = Path(original_name).suffix.lower()
-    if media_type == "application/pdf" or suffix == ".pdf":
-        pdf_pages_path = pdf_pages.write_pdf_pages_observed(
-            store=store,
-            receipt_id=receipt_id,
-            pdf_object_path=object_path,
-        )
-        events.append_receipt_pdf_pages_observed(
-            store=store,
-            receipt_id=receipt_id,
-            pdf_pages_path=pdf_pages_path,
-        )
-        pdf_pages_payload = json.loads(pdf_pages_path.read_text(encoding="utf-8"))
-        pages = pdf_pages_payload.get("observed", {}).get("pages", [])
-        from PIL import Image
-        import pytesseract
-
-        page_results = []
-        for page in pages:
-            image_path_value = page["image"]["object_path"]
-            image_path = Path(image_path_value)
-            if not image_path.is_absolute():
-                image_path = store / image_path
-            with Image.open(image_path) as image:
-                page_text = pytesseract.image_to_string(image, lang=lang)
-            page_results.append({"page": page["page"], "text": page_text})
-        joined_text = "\n\n---\n\n".join(result["text"] for result in page_results)
-        engine_version = str(pytesseract.get_tesseract_version())
-        ocr_artifact_path = ocr.write_ocr_observed(
-            store=store,
-            receipt_id=receipt_id,
-            object_path=object_path,
-            lang=lang,
-            text=joined_text,
-            pages=page_results,
-            engine_version=engine_version,
-        )
-        events.append_receipt_ocr_observed(
-            store=store,
-            receipt_id=receipt_id,
-            ocr_path=ocr_artifact_path,
+    with Store(args.store) as handle:
+        try:
+            words = handle.load_ocr_words(args.receipt_id)
+        except StoreError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+    if args.region is not None:
+        try:
+            left, top, right, bottom = (int(value) for value in args.region.split(","))
+        except ValueError:
+            print(f"Invalid region: {args.region}", file=sys.stderr)
+            return 1
+        indices = words.in_region(args.page, left, top, right, bottom, contained=args.contained)
+    else:
+        indices = words.indices(args.page)
+    if args.lowest is not None:
+        indices = words.lowest_confidence(args.lowest, indices)
+    for record in words.records(indices):
+        print(canonical_json_dumps(record))
+    return 0
+
+
+def _cmd_query(args: argparse.Namespace) -> int:
+    with Store(args.store) as handle:
+        rows = handle.catalog.query(limit=args.limit, **_catalog_filters(args))
+    for row in rows:
+        print(canonical_json_dumps(row))
+    return 0
+
+
+def _cmd_search(terms: str, store: Path, limit: int) -> int:
+    with Store(store) as handle:
+        results = handle.search_index.search(terms, limit=limit)
+    for result in results:
+        print(canonical_json_dumps(result))
+    return 0
+
+
+def _cmd_dupes(store: Path, max_distance: int) -> int:
+    from financial_data_lab.store import similarity
+
+    with Store(store) as handle:
+        index, _, unreadable = similarity.update_index(handle)
+    for item in unreadable:
+        print(
+            f"warning: cannot hash {item['receipt_id']} (page {item['page']}): {item['error']}",
+            file=sys.stderr,
         )
-        ocr_ref = layout.relative_to_store(store, ocr_artifact_path)
-        print(f"status: ok ocr_path: {ocr_ref} pages: {len(page_results)}")
-        return 0
-    if suffix not in ocr.SUPPORTED_IMAGE_EXTENSIONS:
-        print(f"Unsupported file type for OCR: {suffix}", file=sys.stderr)
+    for match in similarity.find_duplicates(index, max_distance):
+        print(canonical_json_dumps(match))
+    return 0
+
+
+def _cmd_sync(source: Path, target: Path, workers: int) -> int:
+    from financial_data_lab.store import sync
+
+    try:
+        report = sync.sync_stores(source, target, workers=workers)
+    except StoreError as exc:
+        print(exc, file=sys.stderr)
         return 1
-    ocr_artifact_path = ocr.write_ocr_observed(
-        store=store,
-        receipt_id=receipt_id,
-        object_path=object_path,
-        lang=lang,
+    for error in report["errors"]:
+        print(error, file=sys.stderr)
+    status = "failed" if report["errors"] else "ok"
+    print(
+        f"status: {status} objects: {report['objects']} bytes: {report['object_bytes']} "
+        f"receipts: {report['receipts']} files: {report['files']} events: {report['events']} "
+        f"deferred: {report['deferred']}"
     )
-    events.append_receipt_ocr_observed(
-        store=store,
-        receipt_id=receipt_id,
-        ocr_path=ocr_artifact_path,
+    return 1 if report["errors"] else 0
+
+
+def _cmd_snapshot(store: Path, fast: bool) -> int:
+    from financial_data_lab.store import snapshot
+
+    record = snapshot.take_snapshot(store, use_cache=fast)
+    counts = record["counts"]
+    print(
+        f"root: {record['root']} objects: {counts['objects']} "
+        f"manifests: {counts['manifests']} events: {counts['events']}"
     )
-    ocr_ref = layout.relative_to_store(store, ocr_artifact_path)
-    print(f"status: ok ocr_path: {ocr_ref}")
+    return 0
+
+
+def _cmd_diff(ref: str, store: Path, fast: bool) -> int:
+    from financial_data_lab.store import snapshot
+
+    try:
+        changes = snapshot.diff_snapshot(store, ref, use_cache=fast)
+    except StoreError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    for change in changes:
+        print(canonical_json_dumps(change))
+    if changes:
+        return 1
+    print("Store matches snapshot.")
+    return 0
+
+
+def _cmd_status(args: argparse.Namespace) -> int:
+    with Store(args.store) as handle:
+        views = handle.projections
+        applied = views.rebuild() if args.rebuild else views.update()
+        if args.list_status is not None:
+            for row in views.receipts(args.list_status, limit=args.limit):
+                print(canonical_json_dumps(row))
+            return 0
+        summary = {
+            "applied": applied,
+            "offset": views.offset,
+            "receipts": views.status_counts(),
+            "events": views.event_counts(),
+        }
+    print(canonical_json_dumps(summary))
+    return 0
+
+
+def _cmd_catalog_rebuild(store: Path) -> int:
+    with Store(store) as handle:
+        receipt_count = handle.catalog.rebuild()
+        ocr_count = handle.search_index.rebuild()
+    print(f"status: ok receipts: {receipt_count} ocr_documents: {ocr_count}")
+    return 0
+
+
+def _cmd_pipeline_run(args: argparse.Namespace) -> int:
+    from financial_data_lab.store import pipeline
+
+    try:
+        params = _preprocess_options(args.preprocess, args.preprocess_opt)
+        with Store(args.store) as handle:
+            report = pipeline.run_pipeline(
+                handle,
+                [Path(path) for path in args.inputs],
+                ingest_workers=args.ingest_workers,
+                render_workers=args.render_workers,
+                ocr_workers=args.ocr_workers,
+                queue_size=args.queue_size,
+                lang=args.lang,
+                preprocess=params,
+            )
+    except (StoreError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    for error in report["errors"]:
+        print(f"{error['stage']}: {error['item']}: {error['error']}", file=sys.stderr)
+    for stage in report["stages"]:
+        print(
+            f"stage: {stage['stage']} workers: {stage['workers']} "
+            f"processed: {stage['processed']} skipped: {stage['skipped']} "
+            f"failed: {stage['failed']} throughput: {stage['throughput']}/s "
+            f"busy: {stage['busy_seconds']}s blocked: {stage['blocked_seconds']}s "
+            f"queue_max: {stage['queue_max_depth']}/{stage['queue_capacity']} "
+            f"queue_mean: {stage['queue_mean_depth']}"
+        )
+    status = "failed" if report["errors"] else "ok"
+    print(f"status: {status} elapsed: {report['elapsed_seconds']}s")
+    return 1 if report["errors"] else 0
+
+
+def _cmd_migrate_layout(store: Path, limit: int | None, quiet: bool) -> int:
+    on_progress = None if quiet else (lambda receipt_id: print(f"moved: {receipt_id}", flush=True))
+    moved, complete = migrate.migrate_layout(store, limit=limit, on_progress=on_progress)
+    status = "complete" if complete else "in_progress"
+    print(f"status: {status} moved: {moved} layout_version: {layout.LAYOUT_SHARDED}")
     return 0
 
 
 def main(argv: list[str] | None = None) -> int:
     args = _parse_args(argv)
     if args.command == "ingest":
-        return _cmd_ingest(args.path, args.store)
+        return _cmd_ingest(args.path, args.store, args.warn_dupes)
     if args.command == "export" and args.export_command == "receipts":
-        return _cmd_export_receipts(args.store, args.out)
+        return _cmd_export_receipts(args)
+    if args.command == "export" and args.export_command == "ocr":
+        return _cmd_export_ocr(args.store, args.out, args.rebuild)
     if args.command == "verify":
-        return _cmd_verify(args.store)
+        return _cmd_verify(args)
+    if args.command == "query":
+        return _cmd_query(args)
+    if args.command == "words":
+        return _cmd_words(args)
+    if args.command == "search":
+        return _cmd_search(args.terms, args.store, args.limit)
+    if args.command == "dupes":
+        return _cmd_dupes(args.store, args.max_distance)
+    if args.command == "sync":
+        return _cmd_sync(args.source, args.target, args.workers)
+    if args.command == "snapshot":
+        return _cmd_snapshot(args.store, args.fast)
+    if args.command == "diff":
+        return _cmd_diff(args.snapshot, args.store, args.fast)
+    if args.command == "status":
+        return _cmd_status(args)
+    if args.command == "catalog" and args.catalog_command == "rebuild":
+        return _cmd_catalog_rebuild(args.store)
     if args.command == "show":
         return _cmd_show(args.receipt_id, args.store)
     if args.command == "ocr":
-        return _cmd_ocr(args.receipt_id, args.store, args.lang)
+        return _cmd_ocr(args)
+    if args.command == "pipeline" and args.pipeline_command == "run":
+        return _cmd_pipeline_run(args)
+    if args.command == "migrate-layout":
+        return _cmd_migrate_layout(args.store, args.limit, args.quiet)
     raise SystemExit("Unknown command")
 
 
@@ -0,0 +1,133 @@
+"""NumPy image preprocessing for OCR inputs."""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import numpy as np
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+_SKEW_STEP_DEGREES = 0.25
+_SKEW_SAMPLE_SIDE = 800
+
+
+def grayscale(pixels: np.ndarray) -> np.ndarray:
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32)
+    return pixels[..., :3].astype(np.float32) @ _LUMA
+
+
+def downscale(gray: np.ndarray, factor: int) -> np.ndarray:
+    """Box-filter ``gray`` by an integer ``factor`` with one reshape and mean."""
+    if factor <= 1:
+        return gray
+    height = gray.shape[0] // factor * factor
+    width = gray.shape[1] // factor * factor
+    blocks = gray[:height, :width].reshape(height // factor, factor, width // factor, factor)
+    return blocks.mean(axis=(1, 3))
+
+
+def downscale_factor(shape: tuple[int, ...], dpi: float | None, params: dict[str, Any]) -> int:
+    factor = 1.0
+    if dpi and params["target_dpi"] and dpi > params["target_dpi"]:
+        factor = dpi / params["target_dpi"]
+    if params["max_side"]:
+        factor = max(factor, max(shape[:2]) / params["max_side"])
+    return max(1, math.floor(factor))
+
+
+def otsu_threshold(gray: np.ndarray) -> float:
+    histogram = np.bincount(np.clip(gray, 0, 255).astype(np.uint8).ravel(), minlength=256)
+    if np.count_nonzero(histogram) < 2:
+        # A blank page has no second class to separate: every pixel is paper.
+        return -1.0
+    weights = np.cumsum(histogram).astype(np.float64)
+    means = np.cumsum(histogram * np.arange(256)).astype(np.float64)
+    total = weights[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (means[-1] * weights - means * total) ** 2 / (weights * (total - weights))
+    return float(np.nanargmax(between))
+
+
+def _span(mask: np.ndarray) -> tuple[int, int]:
+    indices = np.flatnonzero(mask)
+    if not len(indices):
+        return 0, len(mask)
+    return int(indices[0]), int(indices[-1]) + 1
+
+
+def crop_to_content(gray: np.ndarray, margin: int = 8) -> np.ndarray:
+    # Keep the rows and columns that are mostly paper, which drops a darker
+    # background around a photographed receipt, then trim blank paper margins.
+    bright = gray > otsu_threshold(gray)
+    top, bottom = _span(bright.mean(axis=1) > 0.5)
+    left, right = _span(bright.mean(axis=0) > 0.5)
+    paper = gray[top:bottom, left:right]
+    ink = ~bright[top:bottom, left:right]
+    ink_top, ink_bottom = _span(ink.any(axis=1))
+    ink_left, ink_right = _span(ink.any(axis=0))
+    return paper[
+        max(0, ink_top - margin) : ink_bottom + margin,
+        max(0, ink_left - margin) : ink_right + margin,
+    ]
+
+
+def estimate_skew(gray: np.ndarray, max_degrees: float) -> float:
+    """Return the angle whose projection of ink pixels onto rows is sharpest."""
+    step = max(1, math.ceil(max(gray.shape) / _SKEW_SAMPLE_SIDE))
+    sample = gray[::step, ::step]
+    ys, xs = np.nonzero(sample <= otsu_threshold(sample))
+    if len(ys) < 2:
+        return 0.0
+    angles = np.arange(-max_degrees, max_degrees + _SKEW_STEP_DEGREES / 2, _SKEW_STEP_DEGREES)
+    radians = np.deg2rad(angles)[:, None]
+    rows = np.rint(ys[None, :] * np.cos(radians) - xs[None, :] * np.sin(radians)).astype(np.int64)
+    rows -= rows.min(axis=1, keepdims=True)
+    scores = [np.var(np.bincount(projection)) for projection in rows]
+    return float(angles[int(np.argmax(scores))])
+
+
+def rotate(gray: np.ndarray, degrees: float, fill: float = 255.0) -> np.ndarray:
+    if not degrees:
+        return gray
+    height, width = gray.shape
+    radians = math.radians(degrees)
+    cos, sin = math.cos(radians), math.sin(radians)
+    center_y, center_x = (height - 1) / 2, (width - 1) / 2
+    ys, xs = np.indices((height, width), dtype=np.float32)
+    ys -= center_y
+    xs -= center_x
+    source_y = np.rint(cos * ys + sin * xs + center_y).astype(np.int64)
+    source_x = np.rint(-sin * ys + cos * xs + center_x).astype(np.int64)
+    inside = (source_y >= 0) & (source_y < height) & (source_x >= 0) & (source_x < width)
+    rotated = np.full_like(gray, fill)
+    rotated[inside] = gray[source_y[inside], source_x[inside]]
+    return rotated
+
+
+def adaptive_binarize(gray: np.ndarray, window: int, offset: float) -> np.ndarray:
+    """Mark pixels darker than their local mean minus ``offset`` as ink, via an integral image."""
+    half = max(1, window // 2)
+    padded = np.pad(gray.astype(np.float64), half + 1, mode="edge")
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    height, width = gray.shape
+    size = 2 * half + 1
+    top = integral[:height, :width]
+    bottom = integral[size : size + height, size : size + width]
+    right = integral[:height, size : size + width]
+    left = integral[size : size + height, :width]
+    local_mean = (bottom - right - left + top) / (size * size)
+    return np.where(gray < local_mean - offset, 0, 255).astype(np.uint8)
+
+
+def preprocess(pixels: np.ndarray, params: dict[str, Any], dpi: float | None = None) -> np.ndarray:
+    gray = grayscale(pixels)
+    gray = downscale(gray, downscale_factor(gray.shape, dpi, params))
+    if params["crop"]:
+        gray = crop_to_content(gray)
+    if params["deskew"]:
+        gray = rotate(gray, estimate_skew(gray, params["max_skew_degrees"]))
+    if params["binarize"]:
+        return adaptive_binarize(gray, params["window"], params["offset"])
+    return np.clip(np.rint(gray), 0, 255).astype(np.uint8)
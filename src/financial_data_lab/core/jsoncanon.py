@@ -1,13 +1,25 @@
-"""Canonical JSON helpers."""
+"""Canonical JSON helpers.
+
+Canonical JSON is what ``json.dumps(sort_keys=True, ensure_ascii=False,
+separators=(",", ":"))`` produces. Other serializers can be registered as
+backends, but they must reproduce those bytes exactly, since manifests, events
+and exports are hashed and compared byte for byte. The ``orjson`` backend is
+used when orjson is installed; set ``FDL_JSON_BACKEND=stdlib`` to opt out.
+"""
 
 from __future__ import annotations
 
 import json
+import math
+import os
+import warnings
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable
 
+JSON_BACKEND_ENV = "FDL_JSON_BACKEND"
 
-def canonical_json_dumps(obj: Any) -> str:
+
+def _stdlib_dumps(obj: Any) -> str:
     return json.dumps(
         obj,
         sort_keys=True,
@@ -16,6 +28,96 @@ def canonical_json_dumps(obj: Any) -> str:
     )
 
 
+def _orjson_compatible(obj: Any) -> bool:
+    # orjson matches the stdlib output byte for byte on plain JSON values, except
+    # for exponent floats (1e16 vs 1e+16), NaN and infinities, non-string keys,
+    # integers outside 64 bits and custom types. orjson itself raises on the keys
+    # and integers, so this walk only checks floats and rejects other types. It
+    # skips strings, the bulk of a manifest, without a call.
+    kind = type(obj)
+    if kind is dict:
+        values: Iterable[Any] = obj.values()
+    elif kind is list or kind is tuple:
+        values = obj
+    elif kind is float:
+        return math.isfinite(obj) and "e" not in repr(obj)
+    else:
+        return kind is str or kind is int or kind is bool or obj is None
+    for value in values:
+        if type(value) is not str and not _orjson_compatible(value):
+            return False
+    return True
+
+
+def _make_orjson_dumps() -> Callable[[Any], str] | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def dumps(obj: Any) -> str:
+        if _orjson_compatible(obj):
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+            except orjson.JSONEncodeError:
+                pass
+        return _stdlib_dumps(obj)
+
+    return dumps
+
+
+_backends: dict[str, Callable[[Any], str]] = {"stdlib": _stdlib_dumps}
+_orjson_dumps = _make_orjson_dumps()
+if _orjson_dumps is not None:
+    _backends["orjson"] = _orjson_dumps
+
+
+def register_backend(name: str, dumps: Callable[[Any], str]) -> None:
+    _backends[name] = dumps
+
+
+def available_backends() -> list[str]:
+    return sorted(_backends)
+
+
+def set_backend(name: str | None = None) -> str:
+    global _dumps, _backend_name
+    if name is None:
+        name = _default_backend()
+    if name not in _backends:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    _dumps = _backends[name]
+    _backend_name = name
+    return name
+
+
+def _default_backend() -> str:
+    default = "orjson" if "orjson" in _backends else "stdlib"
+    name = os.environ.get(JSON_BACKEND_ENV) or default
+    if name not in _backends:
+        # A bad environment value must not make every import fail.
+        warnings.warn(
+            f"Unknown JSON backend in {JSON_BACKEND_ENV}: {name}; using {default}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        return default
+    return name
+
+
+def get_backend() -> str:
+    return _backend_name
+
+
+_dumps: Callable[[Any], str] = _stdlib_dumps
+_backend_name = "stdlib"
+set_backend()
+
+
+def canonical_json_dumps(obj: Any) -> str:
+    return _dumps(obj)
+
+
 def write_canonical_json(path: Path, obj: Any) -> None:
     payload = canonical_json_dumps(obj) + "\n"
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -27,3 +129,13 @@ def append_canonical_json_line(path: Path, obj: Any) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as handle:
         handle.write(payload)
+
+
+def append_canonical_json_lines(path: Path, objs: Iterable[Any]) -> int:
+    count = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as handle:
+        for obj in objs:
+            handle.write(canonical_json_dumps(obj) + "\n")
+            count += 1
+    return count
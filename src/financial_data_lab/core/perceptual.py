@@ -0,0 +1,83 @@
+"""Perceptual image hashes (dHash and pHash) computed with NumPy."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+HASH_BITS = 64
+_DHASH_SIZE = (9, 8)
+_PHASH_SIZE = 32
+_PHASH_LOW = 8
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(_PHASH_SIZE)
+
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    packed = np.packbits(bits.reshape(len(bits), HASH_BITS), axis=1)
+    return packed.view(">u8").ravel().astype(np.uint64)
+
+
+def dhash_batch(pixels: np.ndarray) -> np.ndarray:
+    """Hash grayscale images shaped ``(n, 8, 9)`` by horizontal gradient sign."""
+    return _pack_bits(pixels[:, :, 1:] > pixels[:, :, :-1])
+
+
+def phash_batch(pixels: np.ndarray) -> np.ndarray:
+    """Hash grayscale images shaped ``(n, 32, 32)`` by their low DCT frequencies."""
+    coefficients = np.einsum("ij,njk,lk->nil", _DCT, pixels, _DCT)
+    low = coefficients[:, :_PHASH_LOW, :_PHASH_LOW].reshape(len(pixels), -1)
+    # Leave the DC term out of the median so overall brightness does not shift the threshold.
+    medians = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack_bits(low > medians)
+
+
+def _grayscale(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """Decode ``path`` once and return its pHash and dHash inputs."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        gray = image.convert("L")
+    large = gray.resize((_PHASH_SIZE, _PHASH_SIZE), Image.Resampling.LANCZOS)
+    small = gray.resize(_DHASH_SIZE, Image.Resampling.LANCZOS)
+    return np.asarray(large, dtype=np.float32), np.asarray(small, dtype=np.float32)
+
+
+def perceptual_hashes(paths: Iterable[Path]) -> tuple[np.ndarray, np.ndarray, dict[int, str]]:
+    """Hash each image in ``paths``, skipping files that cannot be decoded.
+
+    Returns the pHashes and dHashes of the decoded images, in order, and the
+    error for each skipped position.
+    """
+    large: list[np.ndarray] = []
+    small: list[np.ndarray] = []
+    errors: dict[int, str] = {}
+    for position, path in enumerate(paths):
+        try:
+            pixels = _grayscale(path)
+        except (OSError, ValueError) as exc:  # PIL's UnidentifiedImageError is an OSError
+            errors[position] = str(exc)
+            continue
+        large.append(pixels[0])
+        small.append(pixels[1])
+    if not large:
+        empty = np.empty(0, dtype=np.uint64)
+        return empty, empty, errors
+    return phash_batch(np.stack(large)), dhash_batch(np.stack(small)), errors
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    xor = np.bitwise_xor(hashes.astype(np.uint64), np.uint64(value))
+    return _POPCOUNT[xor.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int64)
@@ -1 +1,5 @@
 """Store package."""
+
+from financial_data_lab.store.store import Store, StoreError
+
+__all__ = ["Store", "StoreError"]
@@ -2,20 +2,30 @@
 
 from __future__ import annotations
 
+import os
 import shutil
+import threading
 from pathlib import Path
 
 from financial_data_lab.core.hashing import sha256_bytes, sha256_file
 from financial_data_lab.store import layout
 
 
+def _tmp_path(object_path: Path) -> Path:
+    # Concurrent writers of the same object each fill their own temporary file
+    # and rename it into place, so readers never see a partial object.
+    return object_path.with_name(f"{object_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
 def store_object(source_path: Path, store: Path) -> tuple[str, Path, bool]:
     sha256_hex = sha256_file(source_path)
     object_path = layout.object_path(store, sha256_hex)
     existed = object_path.exists()
     if not existed:
         object_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copyfile(source_path, object_path)
+        tmp_path = _tmp_path(object_path)
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, object_path)
     return sha256_hex, object_path, existed
 
 
@@ -25,5 +35,22 @@ def store_object_bytes(data: bytes, store: Path, suffix: str | None = None) -> t
     existed = object_path.exists()
     if not existed:
         object_path.parent.mkdir(parents=True, exist_ok=True)
-        object_path.write_bytes(data)
+        tmp_path = _tmp_path(object_path)
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, object_path)
     return sha256_hex, object_path, existed
+
+
+def copy_object(source_path: Path, store: Path, sha256_hex: str) -> tuple[Path, bool]:
+    """Copy an object from another store, checking its content against ``sha256_hex``."""
+    object_path = layout.object_path(store, sha256_hex)
+    if object_path.exists():
+        return object_path, True
+    object_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(object_path)
+    shutil.copyfile(source_path, tmp_path)
+    if sha256_file(tmp_path) != sha256_hex:
+        tmp_path.unlink()
+        raise ValueError(f"Hash mismatch for {source_path}")
+    os.replace(tmp_path, object_path)
+    return object_path, False
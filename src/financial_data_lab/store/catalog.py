@@ -0,0 +1,183 @@
+"""SQLite catalog of receipt metadata."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from financial_data_lab.store import layout
+
+CATALOG_COLUMNS = (
+    "receipt_id",
+    "sha256",
+    "media_type",
+    "byte_size",
+    "ingested_at",
+    "original_filename",
+    "path_hint",
+    "object_path",
+    "ocr_status",
+    "ocr_at",
+)
+OCR_STATUSES = ("observed", "missing")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    receipt_id TEXT PRIMARY KEY,
+    sha256 TEXT,
+    media_type TEXT,
+    byte_size INTEGER,
+    ingested_at TEXT,
+    original_filename TEXT,
+    path_hint TEXT,
+    object_path TEXT,
+    ocr_status TEXT NOT NULL DEFAULT 'missing',
+    ocr_at TEXT
+);
+CREATE INDEX IF NOT EXISTS receipts_media_type ON receipts (media_type);
+CREATE INDEX IF NOT EXISTS receipts_byte_size ON receipts (byte_size);
+CREATE INDEX IF NOT EXISTS receipts_ingested_at ON receipts (ingested_at);
+CREATE INDEX IF NOT EXISTS receipts_ocr_status ON receipts (ocr_status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class Catalog:
+    """Index over manifests and OCR events, derived and always rebuildable."""
+
+    def __init__(self, store: Path) -> None:
+        self.store = store
+        self.path = layout.catalog_path(store)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        # The built marker commits with the first rebuild, so an interrupted
+        # build leaves an unmarked file that is rebuilt on the next open.
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is None:
+            self.rebuild()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> Catalog:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def upsert_manifest(self, manifest: dict[str, Any]) -> None:
+        with self._conn:
+            self._upsert_manifest(manifest)
+
+    def mark_ocr(self, receipt_id: str, ocr_at: str | None) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE receipts SET ocr_status = 'observed', ocr_at = ? WHERE receipt_id = ?",
+                (ocr_at, receipt_id),
+            )
+
+    def rebuild(self) -> int:
+        count = 0
+        with self._conn:
+            self._conn.execute("DELETE FROM receipts")
+            for receipt_id in layout.iter_receipt_ids(self.store):
+                manifest_path = layout.manifest_path(self.store, receipt_id)
+                try:
+                    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                self._upsert_manifest(manifest)
+                count += 1
+            events_path = layout.events_path(self.store)
+            if events_path.exists():
+                with events_path.open("r", encoding="utf-8") as handle:
+                    for line in handle:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        record = json.loads(line)
+                        if record.get("type") == "receipt.ocr_observed":
+                            self._conn.execute(
+                                "UPDATE receipts SET ocr_status = 'observed', ocr_at = ? "
+                                "WHERE receipt_id = ?",
+                                (record.get("ts"), record.get("receipt_id")),
+                            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+        return count
+
+    def query(
+        self,
+        *,
+        media_type: str | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        ingested_after: str | None = None,
+        ingested_before: str | None = None,
+        filename: str | None = None,
+        ocr_status: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if media_type is not None:
+            clauses.append("media_type = ?")
+            params.append(media_type)
+        if min_size is not None:
+            clauses.append("byte_size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("byte_size <= ?")
+            params.append(max_size)
+        if ingested_after is not None:
+            clauses.append("ingested_at >= ?")
+            params.append(ingested_after)
+        if ingested_before is not None:
+            clauses.append("ingested_at < ?")
+            params.append(ingested_before)
+        if filename is not None:
+            clauses.append("original_filename GLOB ?")
+            params.append(filename)
+        if ocr_status is not None:
+            if ocr_status not in OCR_STATUSES:
+                raise ValueError(f"Unknown OCR status: {ocr_status}")
+            clauses.append("ocr_status = ?")
+            params.append(ocr_status)
+        sql = f"SELECT {', '.join(CATALOG_COLUMNS)} FROM receipts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY receipt_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def receipt_ids(self, **filters: Any) -> list[str]:
+        return [row["receipt_id"] for row in self.query(**filters)]
+
+    def _upsert_manifest(self, manifest: dict[str, Any]) -> None:
+        source = manifest.get("source", {})
+        content = manifest.get("content", {})
+        self._conn.execute(
+            "INSERT INTO receipts (receipt_id, sha256, media_type, byte_size, ingested_at, "
+            "original_filename, path_hint, object_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (receipt_id) DO UPDATE SET sha256 = excluded.sha256, "
+            "media_type = excluded.media_type, byte_size = excluded.byte_size, "
+            "ingested_at = excluded.ingested_at, original_filename = excluded.original_filename, "
+            "path_hint = excluded.path_hint, object_path = excluded.object_path",
+            (
+                manifest.get("receipt_id"),
+                content.get("sha256"),
+                source.get("media_type"),
+                source.get("byte_size"),
+                manifest.get("ingested_at"),
+                source.get("original_filename"),
+                source.get("path_hint"),
+                content.get("object_path"),
+            ),
+        )
@@ -5,8 +5,9 @@ from __future__ import annotations
 import json
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
+from financial_data_lab.core.hashing import sha256_bytes
 from financial_data_lab.core.jsoncanon import append_canonical_json_line
 from financial_data_lab.store import layout
 
@@ -27,6 +28,45 @@ def _event_exists(path: Path, receipt_id: str, event_type: str) -> bool:
     return False
 
 
+def log_head(store: Path) -> str | None:
+    """Hash of the first event line, which identifies an append-only log."""
+    events_path = layout.events_path(store)
+    if not events_path.exists():
+        return None
+    with events_path.open("rb") as handle:
+        first_line = handle.readline()
+    return sha256_bytes(first_line) if first_line.endswith(b"\n") else None
+
+
+def is_log_replaced(store: Path, offset: int, head: str | None) -> bool:
+    """Whether a reader checkpointed at ``offset`` with ``head`` must start over."""
+    if not offset:
+        return False
+    events_path = layout.events_path(store)
+    if not events_path.exists() or events_path.stat().st_size < offset:
+        return True
+    return log_head(store) != head
+
+
+def iter_events_from(store: Path, offset: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield ``(end_offset, event)`` for each complete line after byte ``offset``.
+
+    A trailing line without a newline is still being appended and is left for
+    the next reader.
+    """
+    events_path = layout.events_path(store)
+    if not events_path.exists():
+        return
+    with events_path.open("rb") as handle:
+        handle.seek(offset)
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                yield offset, json.loads(line)
+
+
 def append_receipt_ingested(
     *,
     store: Path,
@@ -109,3 +149,30 @@ def append_receipt_pdf_pages_observed(
     }
     append_canonical_json_line(events_path, payload)
     return True
+
+
+def append_receipt_ocr_words_observed(
+    *,
+    store: Path,
+    receipt_id: str,
+    ocr_words_path: Path,
+    ingested_at: str | None = None,
+) -> bool:
+    events_path = layout.events_path(store)
+    event_type = "receipt.ocr_words_observed"
+    if _event_exists(events_path, receipt_id, event_type):
+        return False
+    if ingested_at is None:
+        ingested_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    ocr_words_ref = layout.relative_to_store(store, ocr_words_path)
+    payload: dict[str, Any] = {
+        "schema": EVENT_SCHEMA,
+        "ts": ingested_at,
+        "type": event_type,
+        "receipt_id": receipt_id,
+        "refs": {
+            "ocr_words_path": str(ocr_words_ref),
+        },
+    }
+    append_canonical_json_line(events_path, payload)
+    return True
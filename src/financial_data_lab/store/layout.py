@@ -2,10 +2,23 @@
 
 from __future__ import annotations
 
+import json
+import os
 from pathlib import Path
+from typing import Any, Iterator
+
+from financial_data_lab.core.jsoncanon import write_canonical_json
 
 DEFAULT_STORE = Path("./data")
 
+LAYOUT_SCHEMA = "financial-data-lab/layout.v1"
+LAYOUT_FLAT = 1
+LAYOUT_SHARDED = 2
+RECEIPT_ID_PREFIX = "rcpt_"
+MANIFEST_FILENAME = "manifest.v1.json"
+
+_layout_cache: dict[Path, tuple[int, dict[str, Any]]] = {}
+
 
 def objects_root(store: Path) -> Path:
     return store / "objects" / "sha256"
@@ -15,26 +28,199 @@ def object_path(store: Path, sha256_hex: str) -> Path:
     return objects_root(store) / sha256_hex[:2] / sha256_hex[2:4] / sha256_hex
 
 
+def derived_root(store: Path) -> Path:
+    return store / "derived"
+
+
+def derived_path(store: Path, key: str) -> Path:
+    return derived_root(store) / key[:2] / key[2:4] / f"{key}.json"
+
+
+def checkpoints_root(store: Path) -> Path:
+    return store / "checkpoints"
+
+
+def ocr_page_checkpoint_path(store: Path, key: str) -> Path:
+    return checkpoints_root(store) / "ocr_pages" / key[:2] / key[2:4] / f"{key}.json"
+
+
+def snapshots_root(store: Path) -> Path:
+    return store / "snapshots"
+
+
+def snapshots_log_path(store: Path) -> Path:
+    return snapshots_root(store) / "snapshots.v1.jsonl"
+
+
+def snapshot_hash_cache_path(store: Path) -> Path:
+    return snapshots_root(store) / "hash_cache.v1.json"
+
+
+def snapshot_node_path(store: Path, node_hash: str) -> Path:
+    return snapshots_root(store) / "nodes" / node_hash[:2] / node_hash[2:4] / f"{node_hash}.json"
+
+
 def receipts_root(store: Path) -> Path:
     return store / "receipts"
 
 
+def layout_marker_path(store: Path) -> Path:
+    return store / "layout.v1.json"
+
+
+def read_layout(store: Path) -> dict[str, Any]:
+    marker = layout_marker_path(store)
+    try:
+        mtime_ns = marker.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {"schema": LAYOUT_SCHEMA, "version": LAYOUT_FLAT, "migrating": False}
+    cached = _layout_cache.get(marker)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    info = json.loads(marker.read_text(encoding="utf-8"))
+    _layout_cache[marker] = (mtime_ns, info)
+    return info
+
+
+def write_layout(store: Path, version: int, *, migrating: bool = False) -> None:
+    marker = layout_marker_path(store)
+    write_canonical_json(marker, {"schema": LAYOUT_SCHEMA, "version": version, "migrating": migrating})
+    _layout_cache.pop(marker, None)
+
+
+def init_layout(store: Path) -> None:
+    """Mark a brand-new store as sharded; a store with receipts but no marker stays v1."""
+    if not receipts_root(store).exists() and not layout_marker_path(store).exists():
+        write_layout(store, LAYOUT_SHARDED)
+
+
+def flat_receipt_dir(store: Path, receipt_id: str) -> Path:
+    return receipts_root(store) / receipt_id
+
+
+def sharded_receipt_dir(store: Path, receipt_id: str) -> Path:
+    key = receipt_id.removeprefix(RECEIPT_ID_PREFIX)
+    return receipts_root(store) / key[:2] / key[2:4] / receipt_id
+
+
+def receipt_dir(store: Path, receipt_id: str) -> Path:
+    info = read_layout(store)
+    if info.get("version", LAYOUT_FLAT) < LAYOUT_SHARDED:
+        return flat_receipt_dir(store, receipt_id)
+    sharded = sharded_receipt_dir(store, receipt_id)
+    if info.get("migrating") and not sharded.exists():
+        flat = flat_receipt_dir(store, receipt_id)
+        if flat.exists():
+            return flat
+    return sharded
+
+
 def manifest_path(store: Path, receipt_id: str) -> Path:
-    return receipts_root(store) / receipt_id / "manifest.v1.json"
+    return receipt_dir(store, receipt_id) / MANIFEST_FILENAME
 
 
 def ocr_path(store: Path, receipt_id: str) -> Path:
-    return receipts_root(store) / receipt_id / "ocr.v1.json"
+    return receipt_dir(store, receipt_id) / "ocr.v1.json"
 
 
 def pdf_pages_path(store: Path, receipt_id: str) -> Path:
-    return receipts_root(store) / receipt_id / "pdf_pages.v1.json"
+    return receipt_dir(store, receipt_id) / "pdf_pages.v1.json"
+
+
+def ocr_words_path(store: Path, receipt_id: str) -> Path:
+    return receipt_dir(store, receipt_id) / "ocr_words.v1.json"
+
+
+def _scandir_names(path: Path) -> list[str]:
+    try:
+        with os.scandir(path) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir())
+    except FileNotFoundError:
+        return []
+
+
+def iter_flat_receipt_ids(store: Path) -> Iterator[str]:
+    root = receipts_root(store)
+    for name in _scandir_names(root):
+        if name.startswith(RECEIPT_ID_PREFIX) and (root / name / MANIFEST_FILENAME).exists():
+            yield name
+
+
+def iter_sharded_receipt_ids(store: Path) -> Iterator[str]:
+    root = receipts_root(store)
+    for first in _scandir_names(root):
+        if first.startswith(RECEIPT_ID_PREFIX):
+            continue
+        for second in _scandir_names(root / first):
+            for name in _scandir_names(root / first / second):
+                if (root / first / second / name / MANIFEST_FILENAME).exists():
+                    yield name
+
+
+def iter_receipt_ids(store: Path) -> Iterator[str]:
+    info = read_layout(store)
+    if info.get("version", LAYOUT_FLAT) < LAYOUT_SHARDED:
+        yield from iter_flat_receipt_ids(store)
+        return
+    if not info.get("migrating"):
+        yield from iter_sharded_receipt_ids(store)
+        return
+    # A receipt moved between the two scans would otherwise be listed twice.
+    seen: set[str] = set()
+    for receipt_id in iter_flat_receipt_ids(store):
+        seen.add(receipt_id)
+        yield receipt_id
+    for receipt_id in iter_sharded_receipt_ids(store):
+        if receipt_id not in seen:
+            yield receipt_id
+
+
+def _scandir_files(path: Path) -> list[str]:
+    try:
+        with os.scandir(path) as entries:
+            return sorted(entry.name for entry in entries if entry.is_file())
+    except FileNotFoundError:
+        return []
+
+
+def iter_object_hashes(store: Path) -> Iterator[str]:
+    """Yield stored object hashes in sorted order from directory listings alone."""
+    root = objects_root(store)
+    for first in _scandir_names(root):
+        for second in _scandir_names(root / first):
+            for name in _scandir_files(root / first / second):
+                if not name.endswith(".tmp"):
+                    yield name
 
 
 def events_path(store: Path) -> Path:
     return store / "events" / "events.v1.jsonl"
 
 
+def index_root(store: Path) -> Path:
+    return store / "index"
+
+
+def catalog_path(store: Path) -> Path:
+    return index_root(store) / "catalog.v1.sqlite"
+
+
+def search_index_path(store: Path) -> Path:
+    return index_root(store) / "search.v1.sqlite"
+
+
+def similarity_index_path(store: Path) -> Path:
+    return index_root(store) / "phash.v1.npz"
+
+
+def projections_path(store: Path) -> Path:
+    return index_root(store) / "projections.v1.sqlite"
+
+
+def sync_state_path(store: Path) -> Path:
+    return index_root(store) / "sync.v1.json"
+
+
 def exports_root(store: Path) -> Path:
     return store / "exports"
 
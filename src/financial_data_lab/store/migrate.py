@@ -0,0 +1,74 @@
+"""Store layout migrations."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable
+
+from financial_data_lab.store import layout
+
+
+def _move_receipt_dir(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if not target.exists():
+        os.rename(source, target)
+        return
+    # A previous run was interrupted mid-move; keep whatever already landed.
+    for entry in source.iterdir():
+        destination = target / entry.name
+        if destination.exists():
+            entry.unlink()
+        else:
+            os.rename(entry, destination)
+    source.rmdir()
+
+
+def _pending_flat_receipt_ids(store: Path) -> list[str]:
+    receipts_root = layout.receipts_root(store)
+    return sorted(
+        path.name
+        for path in (receipts_root.iterdir() if receipts_root.exists() else [])
+        if path.is_dir() and path.name.startswith(layout.RECEIPT_ID_PREFIX)
+    )
+
+
+def migrate_layout(
+    store: Path,
+    *,
+    limit: int | None = None,
+    on_progress: Callable[[str], None] | None = None,
+) -> tuple[int, bool]:
+    """Move flat receipt directories into the sharded layout.
+
+    The store stays readable while this runs: the layout marker is switched to
+    ``migrating`` first, so readers look in both places until every receipt has
+    moved. Interrupted or ``limit``-bounded runs resume where they stopped.
+    Returns the number of receipts moved and whether the migration finished.
+    """
+    info = layout.read_layout(store)
+    if info.get("version", layout.LAYOUT_FLAT) >= layout.LAYOUT_SHARDED and not info.get("migrating"):
+        return 0, True
+    layout.write_layout(store, layout.LAYOUT_SHARDED, migrating=True)
+    moved = 0
+    # A writer that resolved the flat path before its directory moved recreates
+    # it, so keep rescanning until no flat directory is left.
+    while pending := _pending_flat_receipt_ids(store):
+        for receipt_id in pending:
+            if limit is not None and moved >= limit:
+                return moved, False
+            _move_receipt_dir(
+                layout.flat_receipt_dir(store, receipt_id),
+                layout.sharded_receipt_dir(store, receipt_id),
+            )
+            moved += 1
+            if on_progress is not None:
+                on_progress(receipt_id)
+    layout.write_layout(store, layout.LAYOUT_SHARDED, migrating=False)
+    # Writes that raced with the marker update still land in flat directories.
+    for receipt_id in _pending_flat_receipt_ids(store):
+        _move_receipt_dir(
+            layout.flat_receipt_dir(store, receipt_id),
+            layout.sharded_receipt_dir(store, receipt_id),
+        )
+    return moved, True
@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
+import json
+import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from financial_data_lab.core.jsoncanon import write_canonical_json
-from financial_data_lab.store import layout
+from financial_data_lab.core.hashing import sha256_bytes
+from financial_data_lab.core.jsoncanon import canonical_json_dumps, write_canonical_json
+from financial_data_lab.store import layout, ocr_words
+from financial_data_lab.store.preprocess import preprocess_object
 
 OCR_SCHEMA = "financial-data-lab/ocr.v1"
+OCR_PAGE_CHECKPOINT_SCHEMA = "financial-data-lab/ocr_page_checkpoint.v1"
 SUPPORTED_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
 
 
@@ -23,11 +29,12 @@ def build_ocr_observed(
     lang: str,
     created_at: str,
     pages: list[dict[str, Any]] | None = None,
+    preprocess: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     observed: dict[str, Any] = {"text": text}
     if pages is not None:
         observed["pages"] = pages
-    return {
+    payload = {
         "schema": OCR_SCHEMA,
         "receipt_id": receipt_id,
         "created_at": created_at,
@@ -41,6 +48,147 @@ def build_ocr_observed(
         },
         "observed": observed,
     }
+    if preprocess is not None:
+        payload["preprocess"] = preprocess
+    return payload
+
+
+def tesseract_version() -> str:
+    import pytesseract
+
+    return str(pytesseract.get_tesseract_version())
+
+
+def ocr_image(
+    *,
+    store: Path,
+    image_path: Path,
+    lang: str = "por",
+    preprocess_params: dict[str, Any] | None = None,
+    source_sha256: str | None = None,
+    words: bool = False,
+) -> tuple[str, dict[str, Any] | None, list[dict[str, Any]] | None]:
+    """OCR one image, preprocessed first when ``preprocess_params`` is given.
+
+    With ``words``, a single ``image_to_data`` pass yields both the text and
+    the word boxes, so both come from the same image and Tesseract runs once.
+    """
+    from PIL import Image
+    import pytesseract
+
+    output: dict[str, Any] | None = None
+    if preprocess_params is not None:
+        record = preprocess_object(
+            store=store,
+            source_path=image_path,
+            params=preprocess_params,
+            source_sha256=source_sha256,
+        )
+        output = {key: record["output"][key] for key in ("sha256", "object_path")}
+        image_path = store / output["object_path"]
+    with Image.open(image_path) as image:
+        if not words:
+            return pytesseract.image_to_string(image, lang=lang), output, None
+        data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    return ocr_words.text_from_data(data), output, ocr_words.words_from_data(data)
+
+
+def page_checkpoint_key(
+    image_sha256: str, lang: str, preprocess_params: dict[str, Any] | None
+) -> str:
+    spec = {"image_sha256": image_sha256, "lang": lang, "preprocess": preprocess_params}
+    return sha256_bytes(canonical_json_dumps(spec).encode("utf-8"))
+
+
+def _read_page_checkpoint(path: Path, engine_version: str) -> dict[str, Any] | None:
+    try:
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("engine", {}).get("version") != engine_version:
+        return None
+    return checkpoint
+
+
+def _write_page_checkpoint(path: Path, checkpoint: dict[str, Any]) -> None:
+    # Write then rename so a kill mid-write never leaves a truncated checkpoint.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write_canonical_json(tmp_path, checkpoint)
+    os.replace(tmp_path, path)
+
+
+def ocr_page_images(
+    *,
+    store: Path,
+    pages: list[dict[str, Any]],
+    lang: str = "por",
+    preprocess_params: dict[str, Any] | None = None,
+    words: bool = False,
+) -> tuple[list[dict[str, Any]], str, list[dict[str, Any]], list[tuple[int, list[dict[str, Any]]]]]:
+    """OCR rendered PDF pages, checkpointing each page as soon as it is done.
+
+    Checkpoints are keyed by page image sha256, language and preprocessing
+    parameters, so a rerun after an interruption only OCRs the pages that are
+    still missing and assembles the same results as an uninterrupted run.
+    With ``words``, each page's word boxes are checkpointed with its text and
+    returned as ``(page, words)`` pairs; a checkpoint without words is redone.
+    """
+    engine_version = tesseract_version()
+    page_results: list[dict[str, Any]] = []
+    outputs: list[dict[str, Any]] = []
+    page_words: list[tuple[int, list[dict[str, Any]]]] = []
+    for page in pages:
+        image = page["image"]
+        checkpoint_path = layout.ocr_page_checkpoint_path(
+            store, page_checkpoint_key(image["sha256"], lang, preprocess_params)
+        )
+        checkpoint = _read_page_checkpoint(checkpoint_path, engine_version)
+        if checkpoint is None or (words and checkpoint.get("words") is None):
+            image_path = Path(image["object_path"])
+            if not image_path.is_absolute():
+                image_path = store / image_path
+            page_text, output, words_found = ocr_image(
+                store=store,
+                image_path=image_path,
+                lang=lang,
+                preprocess_params=preprocess_params,
+                source_sha256=image["sha256"],
+                words=words,
+            )
+            checkpoint = {
+                "schema": OCR_PAGE_CHECKPOINT_SCHEMA,
+                "image_sha256": image["sha256"],
+                "lang": lang,
+                "preprocess_params": preprocess_params,
+                "engine": {"name": "tesseract", "version": engine_version},
+                "text": page_text,
+                "words": words_found,
+                "preprocess_output": output,
+            }
+            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            _write_page_checkpoint(checkpoint_path, checkpoint)
+        page_results.append({"page": page["page"], "text": checkpoint["text"]})
+        if words:
+            page_words.append((page["page"], checkpoint["words"]))
+        if checkpoint["preprocess_output"] is not None:
+            outputs.append({"page": page["page"], **checkpoint["preprocess_output"]})
+    return page_results, engine_version, outputs, page_words
+
+
+def discard_page_checkpoints(
+    *,
+    store: Path,
+    pages: list[dict[str, Any]],
+    lang: str = "por",
+    preprocess_params: dict[str, Any] | None = None,
+) -> None:
+    for page in pages:
+        key = page_checkpoint_key(page["image"]["sha256"], lang, preprocess_params)
+        layout.ocr_page_checkpoint_path(store, key).unlink(missing_ok=True)
+
+
+def join_page_texts(page_results: list[dict[str, Any]]) -> str:
+    return "\n\n---\n\n".join(result["text"] for result in page_results)
 
 
 def write_ocr_observed(
@@ -53,6 +201,7 @@ def write_ocr_observed(
     text: str | None = None,
     pages: list[dict[str, Any]] | None = None,
     engine_version: str | None = None,
+    preprocess: dict[str, Any] | None = None,
 ) -> Path:
     ocr_path = layout.ocr_path(store, receipt_id)
     if ocr_path.exists():
@@ -78,6 +227,7 @@ def write_ocr_observed(
         lang=lang,
         created_at=created_at,
         pages=pages,
+        preprocess=preprocess,
     )
     write_canonical_json(ocr_path, payload)
     return ocr_path
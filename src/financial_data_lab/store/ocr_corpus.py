@@ -0,0 +1,172 @@
+"""OCR text corpus as one UTF-8 blob plus a fixed-width offset index.
+
+``ocr_corpus.v1.txt`` holds the text of every OCR'd page back to back.
+``ocr_corpus.v1.idx`` is a little-endian header followed by one record per page::
+
+    header   magic "FDLC", u16 version, u16 reserved
+    record   receipt_id S24 (NUL padded), page i32, length u32, start u64
+
+Page 0 stands for an image receipt without pages. Both files can be memory
+mapped and read without parsing. ``ocr_corpus.v1.json`` records the event log
+offset the corpus is built up to, so updates append only receipts whose OCR
+events are new.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import numpy as np
+
+from financial_data_lab.core.jsoncanon import write_canonical_json
+from financial_data_lab.store import events, layout
+from financial_data_lab.store.search import ocr_page_texts
+from financial_data_lab.store.store import Store, StoreError
+
+OCR_CORPUS_SCHEMA = "financial-data-lab/ocr_corpus.v1"
+TEXT_FILENAME = "ocr_corpus.v1.txt"
+INDEX_FILENAME = "ocr_corpus.v1.idx"
+STATE_FILENAME = "ocr_corpus.v1.json"
+MAGIC = b"FDLC"
+VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+RECORD_DTYPE = np.dtype(
+    [("receipt_id", "S24"), ("page", "<i4"), ("length", "<u4"), ("start", "<u8")]
+)
+
+
+def _empty_state() -> dict[str, Any]:
+    return {
+        "schema": OCR_CORPUS_SCHEMA,
+        "events_offset": 0,
+        "events_head": None,
+        "records": 0,
+        "text_bytes": 0,
+    }
+
+
+def _read_state(out_dir: Path) -> dict[str, Any]:
+    path = out_dir / STATE_FILENAME
+    if not path.exists():
+        return _empty_state()
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_state(out_dir: Path, state: dict[str, Any]) -> None:
+    path = out_dir / STATE_FILENAME
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    write_canonical_json(tmp_path, state)
+    os.replace(tmp_path, path)
+
+
+def _open_truncated(path: Path, size: int) -> BinaryIO:
+    # Bytes past the recorded size belong to an update that did not finish.
+    handle = path.open("r+b" if path.exists() else "w+b")
+    handle.truncate(size)
+    handle.seek(size)
+    return handle
+
+
+def update_ocr_corpus(
+    store: Path, out_dir: Path | None = None, *, rebuild: bool = False
+) -> dict[str, Any]:
+    """Append OCR text for receipts with new ``receipt.ocr_observed`` events."""
+    if out_dir is None:
+        out_dir = layout.exports_root(store)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state = _read_state(out_dir)
+    if rebuild or events.is_log_replaced(store, state["events_offset"], state["events_head"]):
+        state = _empty_state()
+    offset = state["events_offset"]
+    added = 0
+    skipped = 0
+    with Store(store) as handle, _open_truncated(
+        out_dir / TEXT_FILENAME, state["text_bytes"]
+    ) as text_file, _open_truncated(
+        out_dir / INDEX_FILENAME, _HEADER.size + state["records"] * RECORD_DTYPE.itemsize
+    ) as index_file:
+        if state["records"] == 0:
+            index_file.seek(0)
+            index_file.write(_HEADER.pack(MAGIC, VERSION, 0))
+        start = state["text_bytes"]
+        for offset, event in events.iter_events_from(store, offset):
+            if event.get("type") != "receipt.ocr_observed":
+                continue
+            receipt_id = event["receipt_id"]
+            try:
+                payload = handle.load_ocr(receipt_id)
+            except StoreError:
+                skipped += 1
+                continue
+            pages = ocr_page_texts(payload)
+            records = np.zeros(len(pages), dtype=RECORD_DTYPE)
+            for position, (page, text) in enumerate(pages):
+                data = text.encode("utf-8")
+                text_file.write(data)
+                records[position] = (receipt_id.encode("ascii"), page or 0, len(data), start)
+                start += len(data)
+            index_file.write(records.tobytes())
+            added += len(pages)
+        text_file.flush()
+        index_file.flush()
+        os.fsync(text_file.fileno())
+        os.fsync(index_file.fileno())
+    state.update(
+        {
+            "events_offset": offset,
+            "events_head": events.log_head(store),
+            "records": state["records"] + added,
+            "text_bytes": start,
+        }
+    )
+    _write_state(out_dir, state)
+    return {
+        "added": added,
+        "skipped": skipped,
+        "records": state["records"],
+        "text_bytes": state["text_bytes"],
+        "text_path": out_dir / TEXT_FILENAME,
+        "index_path": out_dir / INDEX_FILENAME,
+    }
+
+
+def _map(path: Path) -> bytes | mmap.mmap:
+    with path.open("rb") as handle:
+        if path.stat().st_size == 0:
+            return b""
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class OcrCorpus:
+    """Read-only view over a mapped corpus blob and its offset index."""
+
+    def __init__(self, text: bytes | mmap.mmap, index: bytes | mmap.mmap, records: int) -> None:
+        magic, version, _ = _HEADER.unpack_from(index, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not an ocr_corpus v1 index.")
+        self._text = text
+        self.index = np.frombuffer(index, dtype=RECORD_DTYPE, count=records, offset=_HEADER.size)
+
+    @classmethod
+    def open(cls, out_dir: Path) -> OcrCorpus:
+        state = _read_state(out_dir)
+        return cls(_map(out_dir / TEXT_FILENAME), _map(out_dir / INDEX_FILENAME), state["records"])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def text(self, position: int) -> str:
+        record = self.index[position]
+        start = int(record["start"])
+        return bytes(self._text[start : start + int(record["length"])]).decode("utf-8")
+
+    def positions(self, receipt_id: str, page: int | None = None) -> np.ndarray:
+        mask = self.index["receipt_id"] == receipt_id.encode("ascii")
+        if page is not None:
+            mask &= self.index["page"] == page
+        return np.flatnonzero(mask)
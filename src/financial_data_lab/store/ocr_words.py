@@ -0,0 +1,237 @@
+"""Word-level OCR boxes in a compact columnar binary format.
+
+An ``ocr_words`` object is a little-endian struct of arrays::
+
+    header   magic "FDLW", u16 version, u16 reserved, u32 word_count, u32 text_bytes
+    page     u16[n]      line  u32[n]
+    left     i32[n]      top   i32[n]      width  i32[n]      height  i32[n]
+    conf     f32[n]
+    offsets  u32[n + 1]  (into the UTF-8 text blob)
+    text     u8[text_bytes]
+
+Each column starts on an 8-byte boundary and words are sorted by page, so a
+mapped object is queried with NumPy views and no parsing.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from financial_data_lab.core.jsoncanon import write_canonical_json
+from financial_data_lab.store import artifacts, layout
+
+OCR_WORDS_SCHEMA = "financial-data-lab/ocr_words.v1"
+WORDS_FORMAT = "fdl-words.v1"
+MAGIC = b"FDLW"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+_COLUMNS = (
+    ("page", "<u2"),
+    ("line", "<u4"),
+    ("left", "<i4"),
+    ("top", "<i4"),
+    ("width", "<i4"),
+    ("height", "<i4"),
+    ("conf", "<f4"),
+)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def _column_offsets(word_count: int) -> tuple[dict[str, int], int, int]:
+    offsets: dict[str, int] = {}
+    position = _align(_HEADER.size)
+    for name, dtype in _COLUMNS:
+        offsets[name] = position
+        position = _align(position + word_count * np.dtype(dtype).itemsize)
+    text_offsets = position
+    text_start = _align(position + (word_count + 1) * 4)
+    return offsets, text_offsets, text_start
+
+
+def encode_words(words: list[dict[str, Any]]) -> bytes:
+    words = sorted(words, key=lambda word: word["page"])
+    count = len(words)
+    encoded = [word["text"].encode("utf-8") for word in words]
+    text_offsets = np.zeros(count + 1, dtype="<u4")
+    np.cumsum([len(text) for text in encoded], out=text_offsets[1:])
+    text_blob = b"".join(encoded)
+    offsets, offsets_position, text_start = _column_offsets(count)
+    buffer = bytearray(text_start + len(text_blob))
+    _HEADER.pack_into(buffer, 0, MAGIC, VERSION, 0, count, len(text_blob))
+    for name, dtype in _COLUMNS:
+        column = np.array([word[name] for word in words], dtype=dtype)
+        buffer[offsets[name] : offsets[name] + column.nbytes] = column.tobytes()
+    buffer[offsets_position : offsets_position + text_offsets.nbytes] = text_offsets.tobytes()
+    buffer[text_start:] = text_blob
+    return bytes(buffer)
+
+
+class OcrWords:
+    """Read-only columnar view over an encoded words object."""
+
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        magic, version, _, count, text_bytes = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not an ocr_words v1 object.")
+        self._data = data
+        offsets, offsets_position, text_start = _column_offsets(count)
+        for name, dtype in _COLUMNS:
+            column = np.frombuffer(data, dtype=dtype, count=count, offset=offsets[name])
+            setattr(self, name, column)
+        self.text_offsets = np.frombuffer(
+            data, dtype="<u4", count=count + 1, offset=offsets_position
+        )
+        self._text = memoryview(data)[text_start : text_start + text_bytes]
+
+    @classmethod
+    def open(cls, path: Path) -> OcrWords:
+        with path.open("rb") as handle:
+            if path.stat().st_size == 0:
+                raise ValueError("Not an ocr_words v1 object.")
+            return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return len(self.page)
+
+    def text(self, index: int) -> str:
+        start, end = int(self.text_offsets[index]), int(self.text_offsets[index + 1])
+        return bytes(self._text[start:end]).decode("utf-8")
+
+    def page_range(self, page: int) -> tuple[int, int]:
+        low = int(np.searchsorted(self.page, page, side="left"))
+        high = int(np.searchsorted(self.page, page, side="right"))
+        return low, high
+
+    def indices(self, page: int | None = None) -> np.ndarray:
+        low, high = (0, len(self)) if page is None else self.page_range(page)
+        return np.arange(low, high)
+
+    def in_region(
+        self,
+        page: int,
+        left: int,
+        top: int,
+        right: int,
+        bottom: int,
+        *,
+        contained: bool = False,
+    ) -> np.ndarray:
+        low, high = self.page_range(page)
+        x0 = self.left[low:high]
+        y0 = self.top[low:high]
+        x1 = x0 + self.width[low:high]
+        y1 = y0 + self.height[low:high]
+        if contained:
+            mask = (x0 >= left) & (y0 >= top) & (x1 <= right) & (y1 <= bottom)
+        else:
+            mask = (x0 < right) & (x1 > left) & (y0 < bottom) & (y1 > top)
+        return np.flatnonzero(mask) + low
+
+    def lowest_confidence(self, count: int, indices: np.ndarray | None = None) -> np.ndarray:
+        if indices is None:
+            indices = self.indices()
+        conf = self.conf[indices]
+        count = min(count, len(conf))
+        if count <= 0:
+            return np.empty(0, dtype=np.int64)
+        nearest = np.argpartition(conf, count - 1)[:count]
+        return indices[nearest[np.argsort(conf[nearest], kind="stable")]]
+
+    def records(self, indices: np.ndarray) -> list[dict[str, Any]]:
+        return [
+            {
+                "page": int(self.page[index]),
+                "line": int(self.line[index]),
+                "left": int(self.left[index]),
+                "top": int(self.top[index]),
+                "width": int(self.width[index]),
+                "height": int(self.height[index]),
+                "conf": round(float(self.conf[index]), 2),
+                "text": self.text(index),
+            }
+            for index in indices.tolist()
+        ]
+
+
+def words_from_data(data: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """Word boxes from a ``pytesseract.image_to_data`` dict, without their page."""
+    words: list[dict[str, Any]] = []
+    line_keys: dict[tuple[int, int, int], int] = {}
+    for index, text in enumerate(data["text"]):
+        if data["level"][index] != 5 or not text.strip():
+            continue
+        line_key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+        words.append(
+            {
+                "line": line_keys.setdefault(line_key, len(line_keys)),
+                "left": data["left"][index],
+                "top": data["top"][index],
+                "width": data["width"][index],
+                "height": data["height"][index],
+                "conf": float(data["conf"][index]),
+                "text": text,
+            }
+        )
+    return words
+
+
+def text_from_data(data: dict[str, list[Any]]) -> str:
+    """Page text from the same ``image_to_data`` pass: words by line, paragraphs apart."""
+    paragraphs: dict[tuple[int, int], dict[int, list[str]]] = {}
+    for index, text in enumerate(data["text"]):
+        if data["level"][index] != 5 or not text.strip():
+            continue
+        paragraph = paragraphs.setdefault((data["block_num"][index], data["par_num"][index]), {})
+        paragraph.setdefault(data["line_num"][index], []).append(text)
+    return "\n\n".join(
+        "\n".join(" ".join(line) for line in lines.values()) for lines in paragraphs.values()
+    )
+
+
+def write_ocr_words_observed(
+    *,
+    store: Path,
+    receipt_id: str,
+    page_words: list[tuple[int, list[dict[str, Any]]]],
+    lang: str = "por",
+    engine_version: str,
+    created_at: str | None = None,
+) -> Path:
+    """Encode the words of each ``(page, words)`` pair and record them for ``receipt_id``."""
+    words_path = layout.ocr_words_path(store, receipt_id)
+    if words_path.exists():
+        return words_path
+    if created_at is None:
+        created_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    words = [{**word, "page": page} for page, page_list in page_words for word in page_list]
+    data = encode_words(words)
+    sha256_hex, object_path, _ = artifacts.store_object_bytes(data, store, suffix=".fdlw")
+    payload = {
+        "schema": OCR_WORDS_SCHEMA,
+        "receipt_id": receipt_id,
+        "created_at": created_at,
+        "engine": {
+            "name": "tesseract",
+            "version": engine_version,
+            "lang": lang,
+        },
+        "observed": {
+            "format": WORDS_FORMAT,
+            "word_count": len(words),
+            "page_count": len(page_words),
+            "sha256": sha256_hex,
+            "object_path": str(layout.relative_to_store(store, object_path)),
+            "byte_size": len(data),
+        },
+    }
+    write_canonical_json(words_path, payload)
+    return words_path
@@ -23,16 +23,13 @@ def _render_pdf_pages(pdf_path: Path) -> tuple[str, list[bytes]]:
     return str(getattr(fitz, "__version__", "unknown")), pages
 
 
-def write_pdf_pages_observed(
+def build_pdf_pages_observed(
     *,
     store: Path,
     receipt_id: str,
     pdf_object_path: Path,
     created_at: str | None = None,
-) -> Path:
-    pages_path = layout.pdf_pages_path(store, receipt_id)
-    if pages_path.exists():
-        return pages_path
+) -> dict[str, Any]:
     if created_at is None:
         created_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     engine_version, page_images = _render_pdf_pages(pdf_object_path)
@@ -52,7 +49,7 @@ def write_pdf_pages_observed(
             }
         )
     pdf_ref = layout.relative_to_store(store, pdf_object_path)
-    payload = {
+    return {
         "schema": PDF_PAGES_SCHEMA,
         "receipt_id": receipt_id,
         "created_at": created_at,
@@ -68,5 +65,23 @@ def write_pdf_pages_observed(
             "pages": pages,
         },
     }
+
+
+def write_pdf_pages_observed(
+    *,
+    store: Path,
+    receipt_id: str,
+    pdf_object_path: Path,
+    created_at: str | None = None,
+) -> Path:
+    pages_path = layout.pdf_pages_path(store, receipt_id)
+    if pages_path.exists():
+        return pages_path
+    payload = build_pdf_pages_observed(
+        store=store,
+        receipt_id=receipt_id,
+        pdf_object_path=pdf_object_path,
+        created_at=created_at,
+    )
     write_canonical_json(pages_path, payload)
     return pages_path
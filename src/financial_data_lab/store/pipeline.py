@@ -0,0 +1,210 @@
+"""Concurrent ingest → render → OCR pipeline over bounded queues.
+
+Each stage runs its own worker threads and hands items to the next stage
+through a bounded queue. A full queue blocks the stage feeding it, so a slow
+OCR stage throttles ingest instead of letting work pile up in memory. Hashing
+and copying, PDF rendering and Tesseract all release the GIL, so the stages
+overlap disk and CPU work.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from financial_data_lab.store.store import Store, StoreError
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_WORKERS = {"ingest": 2, "render": 1, "ocr": 2}
+
+_DONE = object()
+
+
+def iter_input_files(inputs: Iterable[Path]) -> Iterator[Path]:
+    for path in inputs:
+        if path.is_dir():
+            yield from sorted(entry for entry in path.rglob("*") if entry.is_file())
+        else:
+            yield path
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        work: Callable[[Any], tuple[str, Any]],
+        inbox: queue.Queue[Any],
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"{name} workers must be at least 1.")
+        self.name = name
+        self.workers = workers
+        self.work = work
+        self.inbox = inbox
+        self.next_stage: _Stage | None = None
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: list[dict[str, str]] = []
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.elapsed_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self._running = workers
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, started: float) -> list[threading.Thread]:
+        self._started = started
+        threads = [
+            threading.Thread(target=self._run, name=f"fdl-{self.name}-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def put(self, item: Any) -> None:
+        self.inbox.put(item)
+        depth = self.inbox.qsize()
+        with self._lock:
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def _run(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                break
+            started = time.perf_counter()
+            try:
+                outcome, forward = self.work(item)
+            except Exception as exc:  # a dead worker would stall the pipeline
+                outcome, forward = "failed", None
+                with self._lock:
+                    self.errors.append({"stage": self.name, "item": str(item), "error": str(exc)})
+            finished = time.perf_counter()
+            with self._lock:
+                setattr(self, outcome, getattr(self, outcome) + 1)
+                self.busy_seconds += finished - started
+            if forward is not None and self.next_stage is not None:
+                self.next_stage.put(forward)
+                with self._lock:
+                    self.blocked_seconds += time.perf_counter() - finished
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+            if last:
+                self.elapsed_seconds = time.perf_counter() - self._started
+        if last and self.next_stage is not None:
+            for _ in range(self.next_stage.workers):
+                self.next_stage.inbox.put(_DONE)
+
+    def report(self) -> dict[str, Any]:
+        elapsed = self.elapsed_seconds
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "throughput": round(self.processed / elapsed, 2) if elapsed else 0.0,
+            "queue_capacity": self.inbox.maxsize,
+            "queue_max_depth": self.max_depth,
+            "queue_mean_depth": (
+                round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0
+            ),
+        }
+
+
+def run_pipeline(
+    handle: Store,
+    inputs: Iterable[Path],
+    *,
+    ingest_workers: int = DEFAULT_WORKERS["ingest"],
+    render_workers: int = DEFAULT_WORKERS["render"],
+    ocr_workers: int = DEFAULT_WORKERS["ocr"],
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    lang: str = "por",
+    preprocess: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Ingest ``inputs`` and render and OCR each new receipt, stage by stage.
+
+    Directories are walked recursively. Files with identical content are
+    rendered and OCR'd once. Failures are collected in the report rather than
+    stopping the run.
+    """
+    inputs = [Path(path) for path in inputs]
+    for path in inputs:
+        if not path.exists():
+            raise StoreError(f"Input not found: {path}")
+    if queue_size < 1:
+        raise ValueError("queue_size must be at least 1.")
+    seen: set[str] = set()
+    seen_lock = threading.Lock()
+
+    def ingest(source_path: Path) -> tuple[str, Any]:
+        receipt_id, _, _ = handle.ingest(source_path)
+        with seen_lock:
+            if receipt_id in seen:
+                return "skipped", None
+            seen.add(receipt_id)
+        return "processed", receipt_id
+
+    def render(receipt_id: str) -> tuple[str, Any]:
+        if not handle.is_pdf(receipt_id):
+            return "skipped", receipt_id
+        handle.write_pdf_pages(receipt_id)
+        return "processed", receipt_id
+
+    def run_ocr(receipt_id: str) -> tuple[str, Any]:
+        if not handle.is_ocr_supported(receipt_id):
+            return "skipped", None
+        handle.write_ocr(receipt_id, lang=lang, preprocess=preprocess)
+        return "processed", None
+
+    stages = [
+        _Stage("ingest", ingest_workers, ingest, queue.Queue(queue_size)),
+        _Stage("render", render_workers, render, queue.Queue(queue_size)),
+        _Stage("ocr", ocr_workers, run_ocr, queue.Queue(queue_size)),
+    ]
+    for stage, next_stage in zip(stages, stages[1:]):
+        stage.next_stage = next_stage
+
+    feed_errors: list[dict[str, str]] = []
+
+    def feed() -> None:
+        item = ""
+        try:
+            for path in iter_input_files(inputs):
+                item = str(path)
+                stages[0].put(path)
+        except Exception as exc:  # the stages still need their sentinels to finish
+            feed_errors.append({"stage": "feed", "item": item, "error": str(exc)})
+        finally:
+            for _ in range(stages[0].workers):
+                stages[0].inbox.put(_DONE)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=feed, name="fdl-feed", daemon=True)]
+    for stage in stages:
+        threads.extend(stage.start(started))
+    threads[0].start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "stages": [stage.report() for stage in stages],
+        "errors": feed_errors + [error for stage in stages for error in stage.errors],
+    }
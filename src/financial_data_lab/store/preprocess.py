@@ -0,0 +1,118 @@
+"""Cached OCR preprocessing stored as derived objects."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from financial_data_lab.core.hashing import sha256_bytes, sha256_file
+from financial_data_lab.core.jsoncanon import canonical_json_dumps, write_canonical_json
+from financial_data_lab.store import artifacts, layout
+
+DERIVED_SCHEMA = "financial-data-lab/derived.v1"
+PREPROCESS_OPERATION = "ocr_preprocess"
+DEFAULT_PARAMS: dict[str, Any] = {
+    "target_dpi": 300,
+    "max_side": 2000,
+    "crop": True,
+    "deskew": True,
+    "max_skew_degrees": 5.0,
+    "binarize": True,
+    "window": 31,
+    "offset": 10,
+}
+
+
+def _matches_type(value: Any, default: Any) -> bool:
+    # bool is a subclass of int, so it is checked on its own; ints pass for floats.
+    if isinstance(default, bool) or isinstance(value, bool):
+        return isinstance(value, bool) and isinstance(default, bool)
+    if isinstance(default, float):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+
+def resolve_params(overrides: dict[str, Any] | None = None) -> dict[str, Any]:
+    params = dict(DEFAULT_PARAMS)
+    for key, value in (overrides or {}).items():
+        if key not in DEFAULT_PARAMS:
+            raise ValueError(f"Unknown preprocess parameter: {key}")
+        if not _matches_type(value, DEFAULT_PARAMS[key]):
+            raise ValueError(f"Invalid value for preprocess parameter {key}: {value!r}")
+        params[key] = value
+    return params
+
+
+def derivation_key(source_sha256: str, params: dict[str, Any]) -> str:
+    spec = {"operation": PREPROCESS_OPERATION, "params": params, "source_sha256": source_sha256}
+    return sha256_bytes(canonical_json_dumps(spec).encode("utf-8"))
+
+
+def _read_record(record_path: Path) -> dict[str, Any] | None:
+    # A truncated or hand-edited record is recomputed like a missing one.
+    try:
+        record = json.loads(record_path.read_text(encoding="utf-8"))
+        record["output"]["sha256"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return record
+
+
+def preprocess_object(
+    *,
+    store: Path,
+    source_path: Path,
+    params: dict[str, Any],
+    source_sha256: str | None = None,
+) -> dict[str, Any]:
+    """Preprocess ``source_path`` once per parameter set and return the derivation record.
+
+    The record maps the source object and parameters to a content-addressed PNG,
+    so reruns and other receipts with the same page image reuse the output.
+    """
+    if source_sha256 is None:
+        source_sha256 = sha256_file(source_path)
+    key = derivation_key(source_sha256, params)
+    record_path = layout.derived_path(store, key)
+    record = _read_record(record_path)
+    if record is not None and layout.object_path(store, record["output"]["sha256"]).exists():
+        return record
+
+    import numpy as np
+    from PIL import Image
+
+    from financial_data_lab.core import imageprep
+
+    with Image.open(source_path) as image:
+        dpi = image.info.get("dpi")
+        pixels = np.asarray(image.convert("RGB"))
+    processed = imageprep.preprocess(pixels, params, dpi=float(dpi[0]) if dpi else None)
+    buffer = io.BytesIO()
+    Image.fromarray(processed).save(buffer, format="PNG")
+    data = buffer.getvalue()
+    sha256_hex, object_path, _ = artifacts.store_object_bytes(data, store, suffix=".png")
+    record = {
+        "schema": DERIVED_SCHEMA,
+        "operation": PREPROCESS_OPERATION,
+        "params": params,
+        "input": {
+            "sha256": source_sha256,
+            "object_path": str(layout.relative_to_store(store, source_path)),
+        },
+        "output": {
+            "sha256": sha256_hex,
+            "object_path": str(layout.relative_to_store(store, object_path)),
+            "media_type": "image/png",
+            "byte_size": len(data),
+            "width": int(processed.shape[1]),
+            "height": int(processed.shape[0]),
+        },
+    }
+    tmp_path = record_path.with_name(f"{record_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write_canonical_json(tmp_path, record)
+    os.replace(tmp_path, record_path)
+    return record
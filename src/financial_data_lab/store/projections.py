@@ -0,0 +1,202 @@
+"""Materialized views folded from the event log.
+
+The event log is append-only, so each view records the byte offset of the
+last event it applied and later updates read only what was appended since.
+The views are derived data: they are rebuilt from the log when it is missing,
+shorter than the checkpoint or starts with a different first event.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from financial_data_lab.store import events, layout
+
+LIFECYCLE_STATUSES = ("ingested", "paged", "ocr_observed")
+EVENT_COLUMNS = {
+    "receipt.ingested": "ingested_at",
+    "receipt.pdf_pages_observed": "pdf_pages_at",
+    "receipt.ocr_observed": "ocr_at",
+    "receipt.ocr_words_observed": "ocr_words_at",
+}
+# Stays under SQLite's default limit on bound parameters.
+_SQL_BATCH = 500
+RECEIPT_STATUS_COLUMNS = (
+    "receipt_id",
+    "status",
+    "ingested_at",
+    "pdf_pages_at",
+    "ocr_at",
+    "ocr_words_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    offset INTEGER NOT NULL,
+    head TEXT
+);
+CREATE TABLE IF NOT EXISTS receipt_status (
+    receipt_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    ingested_at TEXT,
+    pdf_pages_at TEXT,
+    ocr_at TEXT,
+    ocr_words_at TEXT
+);
+CREATE INDEX IF NOT EXISTS receipt_status_status ON receipt_status (status);
+CREATE TABLE IF NOT EXISTS event_counts (
+    type TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (type, day)
+);
+"""
+
+_STATUS_SQL = (
+    "CASE WHEN ocr_at IS NOT NULL THEN 'ocr_observed' "
+    "WHEN pdf_pages_at IS NOT NULL THEN 'paged' ELSE 'ingested' END"
+)
+
+
+class Projections:
+    """Per-receipt lifecycle status and event counts per type and day."""
+
+    def __init__(self, store: Path) -> None:
+        self.store = store
+        self.path = layout.projections_path(store)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> Projections:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    @property
+    def offset(self) -> int:
+        row = self._conn.execute("SELECT offset FROM checkpoint WHERE id = 1").fetchone()
+        return 0 if row is None else row["offset"]
+
+    def update(self) -> int:
+        """Apply events appended since the checkpoint and return how many were applied."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            applied = self._update()
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return applied
+
+    def rebuild(self) -> int:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._reset()
+            applied = self._update()
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return applied
+
+    def status_counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(LIFECYCLE_STATUSES, 0)
+        for row in self._conn.execute(
+            "SELECT status, COUNT(*) AS count FROM receipt_status GROUP BY status"
+        ):
+            counts[row["status"]] = row["count"]
+        return counts
+
+    def receipts(self, status: str | None = None, limit: int | None = None) -> list[dict[str, Any]]:
+        sql = f"SELECT {', '.join(RECEIPT_STATUS_COLUMNS)} FROM receipt_status"
+        params: list[Any] = []
+        if status is not None:
+            if status not in LIFECYCLE_STATUSES:
+                raise ValueError(f"Unknown lifecycle status: {status}")
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY receipt_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def event_keys(self, receipt_ids: list[str]) -> set[tuple[str, str]]:
+        """Return the ``(receipt_id, type)`` pairs already applied for ``receipt_ids``."""
+        keys: set[tuple[str, str]] = set()
+        columns = ", ".join(EVENT_COLUMNS.values())
+        for start in range(0, len(receipt_ids), _SQL_BATCH):
+            batch = receipt_ids[start : start + _SQL_BATCH]
+            rows = self._conn.execute(
+                f"SELECT receipt_id, {columns} FROM receipt_status "
+                f"WHERE receipt_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            for row in rows:
+                keys.update(
+                    (row["receipt_id"], event_type)
+                    for event_type, column in EVENT_COLUMNS.items()
+                    if row[column] is not None
+                )
+        return keys
+
+    def event_counts(self) -> list[dict[str, Any]]:
+        return [
+            dict(row)
+            for row in self._conn.execute(
+                "SELECT type, day, count FROM event_counts ORDER BY day, type"
+            )
+        ]
+
+    def _reset(self) -> None:
+        self._conn.execute("DELETE FROM checkpoint")
+        self._conn.execute("DELETE FROM receipt_status")
+        self._conn.execute("DELETE FROM event_counts")
+
+    def _update(self) -> int:
+        row = self._conn.execute("SELECT offset, head FROM checkpoint WHERE id = 1").fetchone()
+        offset, head = (0, None) if row is None else (row["offset"], row["head"])
+        if events.is_log_replaced(self.store, offset, head):
+            self._reset()
+            offset = 0
+        applied = 0
+        for offset, event in events.iter_events_from(self.store, offset):
+            self._apply(event)
+            applied += 1
+        self._conn.execute(
+            "INSERT INTO checkpoint (id, offset, head) VALUES (1, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET offset = excluded.offset, head = excluded.head",
+            (offset, events.log_head(self.store)),
+        )
+        return applied
+
+    def _apply(self, event: dict[str, Any]) -> None:
+        event_type = event.get("type")
+        ts = event.get("ts")
+        self._conn.execute(
+            "INSERT INTO event_counts (type, day, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (type, day) DO UPDATE SET count = count + 1",
+            (event_type, (ts or "")[:10]),
+        )
+        column = EVENT_COLUMNS.get(event_type)
+        receipt_id = event.get("receipt_id")
+        if column is None or receipt_id is None:
+            return
+        self._conn.execute(
+            f"INSERT INTO receipt_status (receipt_id, status, {column}) VALUES (?, 'ingested', ?) "
+            f"ON CONFLICT (receipt_id) DO UPDATE SET {column} = COALESCE({column}, excluded.{column})",
+            (receipt_id, ts),
+        )
+        self._conn.execute(
+            f"UPDATE receipt_status SET status = {_STATUS_SQL} WHERE receipt_id = ?",
+            (receipt_id,),
+        )
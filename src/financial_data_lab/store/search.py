@@ -0,0 +1,130 @@
+"""Full-text search over OCR text."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from financial_data_lab.store import layout
+
+SNIPPET_TOKENS = 12
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_pages (
+    id INTEGER PRIMARY KEY,
+    receipt_id TEXT NOT NULL,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS ocr_pages_receipt_id ON ocr_pages (receipt_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS ocr_text USING fts5 (
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def match_expression(terms: str) -> str:
+    # Each term becomes a quoted phrase, so punctuation in tax IDs or amounts
+    # is tokenized like the indexed text instead of parsed as FTS5 syntax.
+    phrases = ['"' + term.replace('"', '""') + '"' for term in terms.split()]
+    return " ".join(phrases)
+
+
+def ocr_page_texts(payload: dict[str, Any]) -> list[tuple[int | None, str]]:
+    observed = payload.get("observed", {})
+    pages = observed.get("pages")
+    if pages:
+        return [(page.get("page"), page.get("text", "")) for page in pages]
+    return [(None, observed.get("text", ""))]
+
+
+class SearchIndex:
+    """SQLite FTS5 index with one row per OCR page, derived and always rebuildable."""
+
+    def __init__(self, store: Path) -> None:
+        self.store = store
+        self.path = layout.search_index_path(store)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        # As in the catalog, the built marker commits with the first rebuild.
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is None:
+            self.rebuild()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> SearchIndex:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def index_ocr(self, receipt_id: str, payload: dict[str, Any]) -> None:
+        with self._conn:
+            self._index_ocr(receipt_id, payload)
+
+    def rebuild(self) -> int:
+        count = 0
+        with self._conn:
+            self._conn.execute("DELETE FROM ocr_pages")
+            self._conn.execute("DELETE FROM ocr_text")
+            for receipt_id in layout.iter_receipt_ids(self.store):
+                ocr_path = layout.ocr_path(self.store, receipt_id)
+                if not ocr_path.exists():
+                    continue
+                try:
+                    payload = json.loads(ocr_path.read_text(encoding="utf-8"))
+                except ValueError:
+                    continue
+                self._index_ocr(receipt_id, payload)
+                count += 1
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+        return count
+
+    def search(self, terms: str, *, limit: int = 20) -> list[dict[str, Any]]:
+        expression = match_expression(terms)
+        if not expression or limit < 1:
+            return []
+        # Rank receipts by their best page in SQL and keep only the top ``limit``;
+        # snippets are then built just for the pages of those receipts. bm25() cannot
+        # be used inside an aggregate, hence the materialized ``ranked`` step.
+        rows = self._conn.execute(
+            "WITH ranked AS MATERIALIZED ("
+            "SELECT rowid AS id, bm25(ocr_text) AS rank FROM ocr_text WHERE ocr_text MATCH ?), "
+            "top AS ("
+            "SELECT ocr_pages.receipt_id, MIN(ranked.rank) AS best "
+            "FROM ranked JOIN ocr_pages ON ocr_pages.id = ranked.id "
+            "GROUP BY ocr_pages.receipt_id ORDER BY best, ocr_pages.receipt_id LIMIT ?) "
+            "SELECT ocr_pages.receipt_id, ocr_pages.page, bm25(ocr_text), "
+            "snippet(ocr_text, 0, '[', ']', '...', ?) "
+            "FROM ocr_text JOIN ocr_pages ON ocr_pages.id = ocr_text.rowid "
+            "JOIN top ON top.receipt_id = ocr_pages.receipt_id "
+            "WHERE ocr_text MATCH ? ORDER BY top.best, top.receipt_id, bm25(ocr_text)",
+            (expression, limit, SNIPPET_TOKENS, expression),
+        )
+        results: dict[str, dict[str, Any]] = {}
+        for receipt_id, page, rank, snippet in rows:
+            # bm25() is lower for better matches; flip it so scores read naturally.
+            score = round(-rank, 6)
+            result = results.get(receipt_id)
+            if result is None:
+                result = results[receipt_id] = {"receipt_id": receipt_id, "score": score, "hits": []}
+            result["hits"].append({"page": page, "score": score, "snippet": snippet})
+        return list(results.values())
+
+    def _index_ocr(self, receipt_id: str, payload: dict[str, Any]) -> None:
+        rows = self._conn.execute("SELECT id FROM ocr_pages WHERE receipt_id = ?", (receipt_id,))
+        self._conn.executemany("DELETE FROM ocr_text WHERE rowid = ?", rows.fetchall())
+        self._conn.execute("DELETE FROM ocr_pages WHERE receipt_id = ?", (receipt_id,))
+        for page, text in ocr_page_texts(payload):
+            cursor = self._conn.execute(
+                "INSERT INTO ocr_pages (receipt_id, page) VALUES (?, ?)", (receipt_id, page)
+            )
+            self._conn.execute("INSERT INTO ocr_text (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
@@ -0,0 +1,247 @@
+"""Near-duplicate detection over perceptual hashes of receipt images."""
+
+from __future__ import annotations
+
+import os
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from financial_data_lab.core.perceptual import HASH_BITS, hamming_distances, perceptual_hashes
+from financial_data_lab.store import layout, ocr
+from financial_data_lab.store.store import Store, StoreError
+
+DEFAULT_MAX_DISTANCE = 8
+CHUNK_COUNT = 4
+CHUNK_BITS = HASH_BITS // CHUNK_COUNT
+_HASH_BATCH = 256
+
+
+def _flip_masks(radius: int) -> np.ndarray:
+    masks = [0]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), flips):
+            masks.append(sum(1 << bit for bit in bits))
+    return np.array(masks, dtype=np.uint64)
+
+
+class SimilarityIndex:
+    """Multi-index hashing over 64-bit pHashes.
+
+    Each hash is split into four 16-bit chunks, and each chunk column is kept
+    sorted. Two hashes within distance ``d`` agree to within ``d // 4`` bits on
+    at least one chunk, so a lookup only probes chunk values that close and
+    checks the full distance for the few candidates it finds.
+    Page 0 stands for a whole image receipt; PDF pages keep their page number.
+    """
+
+    def __init__(
+        self,
+        receipt_ids: np.ndarray,
+        pages: np.ndarray,
+        phashes: np.ndarray,
+        dhashes: np.ndarray,
+        unreadable: np.ndarray | None = None,
+    ) -> None:
+        self.receipt_ids = receipt_ids
+        self.pages = pages
+        self.phashes = phashes
+        self.dhashes = dhashes
+        # Receipts with an image that could not be decoded, kept so they are not retried.
+        self.unreadable = np.empty(0, dtype=str) if unreadable is None else unreadable
+        self._chunk_orders: list[np.ndarray] | None = None
+        self._chunk_sorted: list[np.ndarray] | None = None
+
+    @classmethod
+    def empty(cls) -> SimilarityIndex:
+        return cls(
+            np.empty(0, dtype=str),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.uint64),
+            np.empty(0, dtype=np.uint64),
+        )
+
+    @classmethod
+    def load(cls, store: Path) -> SimilarityIndex:
+        path = layout.similarity_index_path(store)
+        if not path.exists():
+            return cls.empty()
+        with np.load(path) as data:
+            unreadable = data["unreadable"] if "unreadable" in data.files else None
+            index = cls(
+                data["receipt_ids"], data["pages"], data["phashes"], data["dhashes"], unreadable
+            )
+            index._chunk_orders = [data[f"chunk_order_{k}"] for k in range(CHUNK_COUNT)]
+            index._chunk_sorted = [data[f"chunk_sorted_{k}"] for k in range(CHUNK_COUNT)]
+        return index
+
+    def save(self, store: Path) -> Path:
+        path = layout.similarity_index_path(store)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        orders, sorted_chunks = self._chunk_tables()
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                receipt_ids=self.receipt_ids,
+                pages=self.pages,
+                phashes=self.phashes,
+                dhashes=self.dhashes,
+                unreadable=self.unreadable,
+                **{f"chunk_order_{k}": orders[k] for k in range(CHUNK_COUNT)},
+                **{f"chunk_sorted_{k}": sorted_chunks[k] for k in range(CHUNK_COUNT)},
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    def __len__(self) -> int:
+        return len(self.phashes)
+
+    def add(
+        self,
+        receipt_ids: list[str],
+        pages: list[int],
+        phashes: np.ndarray,
+        dhashes: np.ndarray,
+    ) -> None:
+        if not receipt_ids:
+            return
+        self.receipt_ids = np.concatenate([self.receipt_ids, np.array(receipt_ids, dtype=str)])
+        self.pages = np.concatenate([self.pages, np.array(pages, dtype=np.int32)])
+        self.phashes = np.concatenate([self.phashes, phashes.astype(np.uint64)])
+        self.dhashes = np.concatenate([self.dhashes, dhashes.astype(np.uint64)])
+        self._chunk_orders = None
+        self._chunk_sorted = None
+
+    def mark_unreadable(self, receipt_ids: list[str]) -> None:
+        if receipt_ids:
+            self.unreadable = np.union1d(self.unreadable, np.array(receipt_ids, dtype=str))
+
+    def lookup(self, phash: int, max_distance: int = DEFAULT_MAX_DISTANCE) -> list[tuple[int, int]]:
+        if not len(self):
+            return []
+        orders, sorted_chunks = self._chunk_tables()
+        masks = _flip_masks(max_distance // CHUNK_COUNT)
+        candidates: list[np.ndarray] = []
+        for k in range(CHUNK_COUNT):
+            chunk = (np.uint64(phash) >> np.uint64(k * CHUNK_BITS)) & np.uint64(0xFFFF)
+            probes = np.unique(np.bitwise_xor(masks, chunk))
+            lows = np.searchsorted(sorted_chunks[k], probes, side="left")
+            highs = np.searchsorted(sorted_chunks[k], probes, side="right")
+            for low, high in zip(lows.tolist(), highs.tolist()):
+                if high > low:
+                    candidates.append(orders[k][low:high])
+        if not candidates:
+            return []
+        positions = np.unique(np.concatenate(candidates))
+        distances = hamming_distances(self.phashes[positions], phash)
+        keep = distances <= max_distance
+        return list(zip(positions[keep].tolist(), distances[keep].tolist()))
+
+    def _chunk_tables(self) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        if self._chunk_orders is None or self._chunk_sorted is None:
+            orders = []
+            sorted_chunks = []
+            for k in range(CHUNK_COUNT):
+                column = (self.phashes >> np.uint64(k * CHUNK_BITS)) & np.uint64(0xFFFF)
+                order = np.argsort(column, kind="stable")
+                orders.append(order)
+                sorted_chunks.append(column[order])
+            self._chunk_orders = orders
+            self._chunk_sorted = sorted_chunks
+        return self._chunk_orders, self._chunk_sorted
+
+
+def _is_image(filename: str | None) -> bool:
+    return Path(filename or "").suffix.lower() in ocr.SUPPORTED_IMAGE_EXTENSIONS
+
+
+def _pending_images(
+    handle: Store, index: SimilarityIndex, receipt_ids: list[str] | None = None
+) -> Iterator[tuple[str, int, Path]]:
+    indexed = set(index.receipt_ids.tolist()) | set(index.unreadable.tolist())
+    if receipt_ids is None:
+        rows = [
+            (row["receipt_id"], row["original_filename"], row["media_type"], row["object_path"])
+            for row in handle.catalog.query()
+        ]
+    else:
+        rows = []
+        for receipt_id, manifest in handle.load_manifests(receipt_ids).items():
+            source = manifest.get("source", {})
+            object_ref = manifest.get("content", {}).get("object_path")
+            rows.append(
+                (receipt_id, source.get("original_filename"), source.get("media_type"), object_ref)
+            )
+    for receipt_id, original_filename, media_type, object_ref in rows:
+        if receipt_id in indexed or not object_ref:
+            continue
+        if _is_image(original_filename):
+            yield receipt_id, 0, handle.resolve(object_ref)
+        elif media_type == "application/pdf" and handle.pdf_pages_path(receipt_id).exists():
+            try:
+                pages = handle.load_pdf_pages(receipt_id).get("observed", {}).get("pages", [])
+            except StoreError:
+                continue
+            for page in pages:
+                yield receipt_id, page["page"], handle.resolve(page["image"]["object_path"])
+
+
+def update_index(
+    handle: Store, receipt_ids: list[str] | None = None
+) -> tuple[SimilarityIndex, int, list[dict[str, Any]]]:
+    """Hash images not yet in the index and return it, the count hashed and the unreadable ones."""
+    index = SimilarityIndex.load(handle.root)
+    pending = [item for item in _pending_images(handle, index, receipt_ids) if item[2].exists()]
+    unreadable: list[dict[str, Any]] = []
+    for start in range(0, len(pending), _HASH_BATCH):
+        batch = pending[start : start + _HASH_BATCH]
+        phashes, dhashes, errors = perceptual_hashes(path for _, _, path in batch)
+        hashed = [item for position, item in enumerate(batch) if position not in errors]
+        index.add([item[0] for item in hashed], [item[1] for item in hashed], phashes, dhashes)
+        unreadable.extend(
+            {"receipt_id": batch[position][0], "page": batch[position][1], "error": error}
+            for position, error in errors.items()
+        )
+    index.mark_unreadable(sorted({item["receipt_id"] for item in unreadable}))
+    if pending or not layout.similarity_index_path(handle.root).exists():
+        index.save(handle.root)
+    return index, len(pending) - len(unreadable), unreadable
+
+
+def _match(index: SimilarityIndex, position: int, other: int, distance: int) -> dict[str, Any]:
+    return {
+        "receipt_id": str(index.receipt_ids[position]),
+        "page": int(index.pages[position]),
+        "duplicate_of": str(index.receipt_ids[other]),
+        "duplicate_page": int(index.pages[other]),
+        "distance": distance,
+    }
+
+
+def find_duplicates(index: SimilarityIndex, max_distance: int = DEFAULT_MAX_DISTANCE) -> list[dict[str, Any]]:
+    matches: list[dict[str, Any]] = []
+    for position, phash in enumerate(index.phashes.tolist()):
+        for other, distance in index.lookup(phash, max_distance):
+            if other <= position or index.receipt_ids[other] == index.receipt_ids[position]:
+                continue
+            matches.append(_match(index, position, other, distance))
+    matches.sort(key=lambda match: (match["receipt_id"], match["page"], match["duplicate_of"]))
+    return matches
+
+
+def duplicates_of(
+    handle: Store, receipt_id: str, max_distance: int = DEFAULT_MAX_DISTANCE
+) -> list[dict[str, Any]]:
+    # Only the first call builds the index over the whole catalog; later calls
+    # hash just this receipt and leave the rest to ``fdl dupes``.
+    exists = layout.similarity_index_path(handle.root).exists()
+    index, _, _ = update_index(handle, [receipt_id] if exists else None)
+    matches: list[dict[str, Any]] = []
+    for position in np.flatnonzero(index.receipt_ids == receipt_id).tolist():
+        for other, distance in index.lookup(int(index.phashes[position]), max_distance):
+            if index.receipt_ids[other] != receipt_id:
+                matches.append(_match(index, position, other, distance))
+    return matches
@@ -0,0 +1,249 @@
+"""Merkle snapshots of a store and diffs against them.
+
+A snapshot is a hash tree with three sections under its root:
+
+    objects/<xx>/<yy>/<sha256>         leaf: sha256 of the object's contents
+    manifests/<xx>/<yy>/<receipt_id>   leaf: sha256 of the manifest file
+    events/<chunk>                     leaf: sha256 of 1024 lines of the event log
+
+Each interior node is the canonical JSON of its ``children`` map and is named by
+its sha256. Nodes are kept in ``snapshots/nodes/``, so snapshots share unchanged
+subtrees. A diff descends only into nodes whose hashes differ from the
+current store.
+
+By default every object, manifest and event line is rehashed. With
+``use_cache=True``, file hashes are taken from ``snapshots/hash_cache.v1.json``
+when size and mtime match, and complete event chunks by log offset, so only
+what changed is read. That is fast but trusts metadata stored in the store
+being audited: a same-size edit with the mtime put back goes unnoticed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Union
+
+from financial_data_lab.core.hashing import sha256_bytes, sha256_file
+from financial_data_lab.core.jsoncanon import append_canonical_json_line, canonical_json_dumps
+from financial_data_lab.store import events as event_log
+from financial_data_lab.store import layout
+from financial_data_lab.store.store import StoreError
+
+SNAPSHOT_SCHEMA = "financial-data-lab/snapshot.v1"
+EVENT_CHUNK_LINES = 1024
+# Length of the path from the root to a leaf, per section.
+LEAF_DEPTHS = {"events": 2, "manifests": 4, "objects": 4}
+
+Tree = dict[str, Union[str, "Tree"]]
+HashedTree = tuple[str, dict[str, Union[str, "HashedTree"]]]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _load_hash_cache(store: Path) -> dict[str, Any]:
+    try:
+        cache = json.loads(layout.snapshot_hash_cache_path(store).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+    return {
+        "objects": cache.get("objects", {}),
+        "manifests": cache.get("manifests", {}),
+        "events": cache.get("events", {}),
+    }
+
+
+def _file_hash(
+    path: Path, key: str, cached: dict[str, list[Any]], fresh: dict[str, list[Any]]
+) -> str:
+    stat = path.stat()
+    entry = cached.get(key)
+    if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+        entry = [stat.st_size, stat.st_mtime_ns, sha256_file(path)]
+    fresh[key] = entry
+    return entry[2]
+
+
+def _event_chunk_hashes(store: Path, cached: dict[str, Any]) -> tuple[list[str], int, dict[str, Any]]:
+    # Complete chunks are cached with the byte offset they end at; only the
+    # lines after it are read, as long as the log was only appended to.
+    offset = cached.get("offset", 0)
+    chunks = list(cached.get("chunks", []))
+    if event_log.is_log_replaced(store, offset, cached.get("head")):
+        offset, chunks = 0, []
+    hashes = list(chunks)
+    line_count = len(chunks) * EVENT_CHUNK_LINES
+    events_path = layout.events_path(store)
+    if events_path.exists():
+        digest = hashlib.sha256()
+        position = offset
+        with events_path.open("rb") as handle:
+            handle.seek(offset)
+            for line in handle:
+                digest.update(line)
+                position += len(line)
+                line_count += 1
+                if line_count % EVENT_CHUNK_LINES == 0:
+                    hashes.append(digest.hexdigest())
+                    digest = hashlib.sha256()
+                    # A last line without a newline is still being appended.
+                    if line.endswith(b"\n"):
+                        chunks.append(hashes[-1])
+                        offset = position
+        if line_count % EVENT_CHUNK_LINES:
+            hashes.append(digest.hexdigest())
+    fresh = {"offset": offset, "head": event_log.log_head(store), "chunks": chunks}
+    return hashes, line_count, fresh
+
+
+def build_tree(store: Path, *, use_cache: bool = False) -> tuple[Tree, dict[str, int]]:
+    # A full rehash starts from an empty cache and leaves a fresh one behind.
+    cache = _load_hash_cache(store) if use_cache else {"objects": {}, "manifests": {}, "events": {}}
+    fresh: dict[str, Any] = {"objects": {}, "manifests": {}}
+    objects: Tree = {}
+    for sha256_hex in layout.iter_object_hashes(store):
+        digest = _file_hash(
+            layout.object_path(store, sha256_hex), sha256_hex, cache["objects"], fresh["objects"]
+        )
+        objects.setdefault(sha256_hex[:2], {}).setdefault(sha256_hex[2:4], {})[sha256_hex] = digest
+    manifests: Tree = {}
+    for receipt_id in layout.iter_receipt_ids(store):
+        key = receipt_id.removeprefix(layout.RECEIPT_ID_PREFIX)
+        digest = _file_hash(
+            layout.manifest_path(store, receipt_id), receipt_id, cache["manifests"], fresh["manifests"]
+        )
+        manifests.setdefault(key[:2], {}).setdefault(key[2:4], {})[receipt_id] = digest
+    chunk_hashes, event_count, fresh["events"] = _event_chunk_hashes(store, cache["events"])
+    if fresh != cache:
+        data = canonical_json_dumps(fresh) + "\n"
+        _write_atomic(layout.snapshot_hash_cache_path(store), data.encode("utf-8"))
+    events: Tree = {f"{index:08d}": digest for index, digest in enumerate(chunk_hashes)}
+    counts = {
+        "objects": sum(len(bucket) for shard in objects.values() for bucket in shard.values()),
+        "manifests": sum(len(bucket) for shard in manifests.values() for bucket in shard.values()),
+        "events": event_count,
+    }
+    return {"events": events, "manifests": manifests, "objects": objects}, counts
+
+
+def hash_tree(tree: Tree, nodes: dict[str, bytes]) -> HashedTree:
+    """Hash ``tree`` bottom-up, collecting each serialized interior node in ``nodes``."""
+    hashed: dict[str, Any] = {}
+    children: dict[str, str] = {}
+    for name, child in tree.items():
+        if isinstance(child, dict):
+            hashed[name] = hash_tree(child, nodes)
+            children[name] = hashed[name][0]
+        else:
+            hashed[name] = children[name] = child
+    data = canonical_json_dumps({"children": children}).encode("utf-8")
+    digest = sha256_bytes(data)
+    nodes[digest] = data
+    return digest, hashed
+
+
+def load_node(store: Path, node_hash: str) -> dict[str, str]:
+    path = layout.snapshot_node_path(store, node_hash)
+    if not path.exists():
+        raise StoreError(f"Snapshot node not found: {node_hash}")
+    return json.loads(path.read_text(encoding="utf-8"))["children"]
+
+
+def take_snapshot(
+    store: Path, *, created_at: str | None = None, use_cache: bool = False
+) -> dict[str, Any]:
+    if created_at is None:
+        created_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    tree, counts = build_tree(store, use_cache=use_cache)
+    nodes: dict[str, bytes] = {}
+    root, _ = hash_tree(tree, nodes)
+    for node_hash, data in nodes.items():
+        path = layout.snapshot_node_path(store, node_hash)
+        if not path.exists():
+            _write_atomic(path, data + b"\n")
+    record = {"schema": SNAPSHOT_SCHEMA, "root": root, "created_at": created_at, "counts": counts}
+    append_canonical_json_line(layout.snapshots_log_path(store), record)
+    return record
+
+
+def list_snapshots(store: Path) -> list[dict[str, Any]]:
+    path = layout.snapshots_log_path(store)
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def resolve_snapshot(store: Path, ref: str) -> str:
+    roots = {record["root"] for record in list_snapshots(store)}
+    matches = sorted(root for root in roots if root.startswith(ref))
+    if not ref or not matches:
+        raise StoreError(f"Unknown snapshot: {ref}")
+    if len(matches) > 1:
+        raise StoreError(f"Ambiguous snapshot prefix: {ref}")
+    return matches[0]
+
+
+def _leaves(store: Path, node: HashedTree | str, path: tuple[str, ...], stored: bool) -> list[str]:
+    # Names of every leaf under an added or removed subtree.
+    if len(path) == LEAF_DEPTHS[path[0]]:
+        return [path[-1]]
+    children = load_node(store, node) if stored else node[1]
+    names: list[str] = []
+    for name, child in sorted(children.items()):
+        names.extend(_leaves(store, child, path + (name,), stored))
+    return names
+
+
+def _diff(
+    store: Path,
+    old_hash: str,
+    new: HashedTree,
+    path: tuple[str, ...],
+    changes: list[dict[str, str]],
+) -> None:
+    old_children = load_node(store, old_hash)
+    new_children = new[1]
+    for name in sorted(set(old_children) | set(new_children)):
+        child_path = path + (name,)
+        old_child = old_children.get(name)
+        new_child = new_children.get(name)
+        is_leaf = len(child_path) == LEAF_DEPTHS[child_path[0]]
+        new_hash = new_child if is_leaf or new_child is None else new_child[0]
+        if old_child == new_hash:
+            continue
+        section = child_path[0]
+        if old_child is None:
+            changes.extend(
+                {"section": section, "name": leaf, "change": "added"}
+                for leaf in _leaves(store, new_child, child_path, stored=False)
+            )
+        elif new_child is None:
+            changes.extend(
+                {"section": section, "name": leaf, "change": "removed"}
+                for leaf in _leaves(store, old_child, child_path, stored=True)
+            )
+        elif is_leaf:
+            changes.append({"section": section, "name": name, "change": "changed"})
+        else:
+            _diff(store, old_child, new_child, child_path, changes)
+
+
+def diff_snapshot(store: Path, ref: str, *, use_cache: bool = False) -> list[dict[str, str]]:
+    """Return leaf-level changes between snapshot ``ref`` and the store as it is now."""
+    root = resolve_snapshot(store, ref)
+    tree, _ = build_tree(store, use_cache=use_cache)
+    current = hash_tree(tree, {})
+    changes: list[dict[str, str]] = []
+    if current[0] != root:
+        _diff(store, root, current, (), changes)
+    return changes
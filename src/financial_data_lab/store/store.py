@@ -0,0 +1,487 @@
+"""Library entry point for reading and writing a store."""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, Iterable, Iterator, TypeVar
+
+from financial_data_lab.core.hashing import receipt_id_from_sha256, sha256_file
+from financial_data_lab.core.jsoncanon import write_canonical_json
+from financial_data_lab.store import artifacts, events, layout, manifests, ocr, pdf_pages
+from financial_data_lab.store.catalog import Catalog
+from financial_data_lab.store.preprocess import resolve_params
+from financial_data_lab.store.projections import Projections
+from financial_data_lab.store.search import SearchIndex
+
+if TYPE_CHECKING:
+    from financial_data_lab.store.ocr_words import OcrWords
+
+DEFAULT_CACHE_SIZE = 1024
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class StoreError(Exception):
+    """Raised when a receipt or one of its artifacts cannot be resolved."""
+
+
+class LRUCache(Generic[K, V]):
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class Store:
+    """A store rooted at ``root`` with cached access to its JSON artifacts.
+
+    Manifests, PDF page listings and OCR artifacts are written once and never
+    rewritten, so parsed documents are kept in a bounded LRU cache keyed by
+    path. Cached documents are shared and must be treated as read-only.
+
+    A store may be shared between threads. Hashing, rendering and OCR run
+    concurrently; manifest and event writes and index updates are serialized.
+    """
+
+    def __init__(self, root: Path = layout.DEFAULT_STORE, *, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.root = Path(root)
+        self._documents: LRUCache[Path, dict[str, Any]] = LRUCache(cache_size)
+        self._object_paths: LRUCache[str, Path] = LRUCache(cache_size)
+        self._catalog: Catalog | None = None
+        self._search_index: SearchIndex | None = None
+        self._projections: Projections | None = None
+        self._lock = threading.RLock()
+
+    def __repr__(self) -> str:
+        return f"Store({str(self.root)!r})"
+
+    def __enter__(self) -> Store:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._catalog is not None:
+                self._catalog.close()
+                self._catalog = None
+            if self._search_index is not None:
+                self._search_index.close()
+                self._search_index = None
+            if self._projections is not None:
+                self._projections.close()
+                self._projections = None
+
+    @property
+    def catalog(self) -> Catalog:
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = Catalog(self.root)
+            return self._catalog
+
+    @property
+    def search_index(self) -> SearchIndex:
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.root)
+            return self._search_index
+
+    @property
+    def projections(self) -> Projections:
+        with self._lock:
+            if self._projections is None:
+                self._projections = Projections(self.root)
+            return self._projections
+
+    def resolve(self, ref: str | Path) -> Path:
+        path = Path(ref)
+        if not path.is_absolute():
+            path = self.root / path
+        return path
+
+    def relative(self, path: Path) -> Path:
+        return layout.relative_to_store(self.root, path)
+
+    def manifest_path(self, receipt_id: str) -> Path:
+        return layout.manifest_path(self.root, receipt_id)
+
+    def ocr_path(self, receipt_id: str) -> Path:
+        return layout.ocr_path(self.root, receipt_id)
+
+    def pdf_pages_path(self, receipt_id: str) -> Path:
+        return layout.pdf_pages_path(self.root, receipt_id)
+
+    def ocr_words_path(self, receipt_id: str) -> Path:
+        return layout.ocr_words_path(self.root, receipt_id)
+
+    def object_path(self, sha256_hex: str) -> Path:
+        return layout.object_path(self.root, sha256_hex)
+
+    def _load_document(self, path: Path, label: str) -> dict[str, Any]:
+        cached = self._documents.get(path)
+        if cached is not None:
+            return cached
+        if not path.exists():
+            raise StoreError(f"{label} not found: {path}")
+        try:
+            document = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError as exc:
+            raise StoreError(f"Invalid JSON in {path}: {exc}") from exc
+        self._documents.put(path, document)
+        return document
+
+    def _write_document(self, path: Path, document: dict[str, Any]) -> None:
+        write_canonical_json(path, document)
+        self._documents.put(path, document)
+
+    def load_manifest(self, receipt_id: str) -> dict[str, Any]:
+        return self._load_document(self.manifest_path(receipt_id), "Manifest")
+
+    def load_pdf_pages(self, receipt_id: str) -> dict[str, Any]:
+        return self._load_document(self.pdf_pages_path(receipt_id), "PDF pages")
+
+    def load_ocr(self, receipt_id: str) -> dict[str, Any]:
+        return self._load_document(self.ocr_path(receipt_id), "OCR artifact")
+
+    def load_ocr_words_artifact(self, receipt_id: str) -> dict[str, Any]:
+        return self._load_document(self.ocr_words_path(receipt_id), "OCR words artifact")
+
+    def load_ocr_words(self, receipt_id: str) -> OcrWords:
+        from financial_data_lab.store.ocr_words import OcrWords
+
+        observed = self.load_ocr_words_artifact(receipt_id).get("observed", {})
+        return OcrWords.open(self.resolve(observed["object_path"]))
+
+    def load_manifests(self, receipt_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        found: dict[str, dict[str, Any]] = {}
+        for receipt_id in receipt_ids:
+            try:
+                found[receipt_id] = self.load_manifest(receipt_id)
+            except StoreError:
+                continue
+        return found
+
+    def receipt_ids(self) -> list[str]:
+        return sorted(layout.iter_receipt_ids(self.root))
+
+    def iter_manifests(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        for receipt_id in self.receipt_ids():
+            yield receipt_id, self.load_manifest(receipt_id)
+
+    def invalidate(self, receipt_id: str | None = None) -> None:
+        if receipt_id is None:
+            self._documents.clear()
+            self._object_paths.clear()
+            return
+        for path in (
+            self.manifest_path(receipt_id),
+            self.pdf_pages_path(receipt_id),
+            self.ocr_path(receipt_id),
+            self.ocr_words_path(receipt_id),
+        ):
+            self._documents.pop(path)
+        self._object_paths.pop(receipt_id)
+
+    def object_path_for(self, receipt_id: str) -> Path:
+        cached = self._object_paths.get(receipt_id)
+        if cached is not None:
+            return cached
+        manifest = self.load_manifest(receipt_id)
+        object_path_value = manifest.get("content", {}).get("object_path")
+        if not object_path_value:
+            raise StoreError(f"Missing object_path in {self.manifest_path(receipt_id)}")
+        object_path = self.resolve(object_path_value)
+        self._object_paths.put(receipt_id, object_path)
+        return object_path
+
+    def object_paths_for(self, receipt_ids: Iterable[str]) -> dict[str, Path]:
+        found: dict[str, Path] = {}
+        for receipt_id in receipt_ids:
+            try:
+                found[receipt_id] = self.object_path_for(receipt_id)
+            except StoreError:
+                continue
+        return found
+
+    def check_object(self, receipt_id: str) -> tuple[bool, bool]:
+        manifest = self.load_manifest(receipt_id)
+        sha256_hex = manifest.get("content", {}).get("sha256")
+        try:
+            object_path = self.object_path_for(receipt_id)
+        except StoreError:
+            return False, False
+        object_exists = object_path.exists()
+        hash_match = bool(object_exists and sha256_hex and sha256_file(object_path) == sha256_hex)
+        return object_exists, hash_match
+
+    def verify_receipt(self, receipt_id: str) -> str | None:
+        manifest_path = self.manifest_path(receipt_id)
+        try:
+            manifest = self.load_manifest(receipt_id)
+            object_path = self.object_path_for(receipt_id)
+        except StoreError as exc:
+            return str(exc)
+        sha256_hex = manifest.get("content", {}).get("sha256")
+        if not sha256_hex:
+            return f"Missing sha256 in {manifest_path}"
+        if not object_path.exists():
+            return f"Missing object: {object_path}"
+        actual_hash = sha256_file(object_path)
+        if sha256_hex != actual_hash:
+            return f"Hash mismatch for {manifest_path}: expected {sha256_hex}, got {actual_hash}"
+        return None
+
+    def verify(self, receipt_ids: Iterable[str] | None = None) -> list[str]:
+        if receipt_ids is None:
+            receipt_ids = self.receipt_ids()
+        errors: list[str] = []
+        for receipt_id in receipt_ids:
+            error = self.verify_receipt(receipt_id)
+            if error is not None:
+                errors.append(error)
+        return errors
+
+    def ingest(self, source_path: Path, *, path_hint: str | None = None) -> tuple[str, Path, Path]:
+        if path_hint is None:
+            path_hint = str(source_path)
+        sha256_hex, object_path, _ = artifacts.store_object(source_path, self.root)
+        receipt_id = receipt_id_from_sha256(sha256_hex)
+        with self._lock:
+            layout.init_layout(self.root)
+            manifest_path = manifests.write_manifest(
+                store=self.root,
+                sha256_hex=sha256_hex,
+                source_path=source_path,
+                path_hint=path_hint,
+                original_filename=source_path.name,
+                object_path=object_path,
+            )
+            events.append_receipt_ingested(
+                store=self.root,
+                receipt_id=receipt_id,
+                manifest_path=self.relative(manifest_path),
+                object_path=self.relative(object_path),
+            )
+            self.catalog.upsert_manifest(self.load_manifest(receipt_id))
+        return receipt_id, object_path, manifest_path
+
+    def write_pdf_pages(self, receipt_id: str) -> dict[str, Any]:
+        pages_path = self.pdf_pages_path(receipt_id)
+        if pages_path.exists():
+            payload = self.load_pdf_pages(receipt_id)
+        else:
+            payload = pdf_pages.build_pdf_pages_observed(
+                store=self.root,
+                receipt_id=receipt_id,
+                pdf_object_path=self._existing_object_path(receipt_id),
+            )
+            self._write_document(pages_path, payload)
+        with self._lock:
+            events.append_receipt_pdf_pages_observed(
+                store=self.root,
+                receipt_id=receipt_id,
+                pdf_pages_path=pages_path,
+            )
+        return payload
+
+    def write_ocr(
+        self,
+        receipt_id: str,
+        *,
+        lang: str = "por",
+        preprocess: dict[str, Any] | None = None,
+        words: bool = False,
+    ) -> tuple[Path, int | None]:
+        """Write the OCR text artifact and, with ``words``, the word boxes from the same pass."""
+        object_path = self._existing_object_path(receipt_id)
+        ocr_artifact_path = self.ocr_path(receipt_id)
+        params = None if preprocess is None else resolve_params(preprocess)
+        if ocr_artifact_path.exists():
+            pages = self.load_ocr(receipt_id).get("observed", {}).get("pages")
+            page_count = None if pages is None else len(pages)
+        elif self.is_pdf(receipt_id):
+            pages = self.write_pdf_pages(receipt_id).get("observed", {}).get("pages", [])
+            page_results, engine_version, outputs, page_words = ocr.ocr_page_images(
+                store=self.root, pages=pages, lang=lang, preprocess_params=params, words=words
+            )
+            ocr_artifact_path = ocr.write_ocr_observed(
+                store=self.root,
+                receipt_id=receipt_id,
+                object_path=object_path,
+                lang=lang,
+                text=ocr.join_page_texts(page_results),
+                pages=page_results,
+                engine_version=engine_version,
+                preprocess=None if params is None else {"params": params, "outputs": outputs},
+            )
+            if words:
+                self._write_ocr_words_observed(receipt_id, page_words, lang, engine_version)
+            ocr.discard_page_checkpoints(
+                store=self.root, pages=pages, lang=lang, preprocess_params=params
+            )
+            page_count = len(page_results)
+        else:
+            suffix = self._suffix(receipt_id)
+            if suffix not in ocr.SUPPORTED_IMAGE_EXTENSIONS:
+                raise StoreError(f"Unsupported file type for OCR: {suffix}")
+            if params is None and not words:
+                ocr_artifact_path = ocr.write_ocr_observed(
+                    store=self.root,
+                    receipt_id=receipt_id,
+                    object_path=object_path,
+                    lang=lang,
+                )
+            else:
+                text, output, found = ocr.ocr_image(
+                    store=self.root,
+                    image_path=object_path,
+                    lang=lang,
+                    preprocess_params=params,
+                    source_sha256=self.load_manifest(receipt_id).get("content", {}).get("sha256"),
+                    words=words,
+                )
+                engine_version = ocr.tesseract_version()
+                ocr_artifact_path = ocr.write_ocr_observed(
+                    store=self.root,
+                    receipt_id=receipt_id,
+                    object_path=object_path,
+                    lang=lang,
+                    text=text,
+                    engine_version=engine_version,
+                    preprocess=(
+                        None
+                        if output is None
+                        else {"params": params, "outputs": [{"page": None, **output}]}
+                    ),
+                )
+                if found is not None:
+                    self._write_ocr_words_observed(receipt_id, [(1, found)], lang, engine_version)
+            page_count = None
+        with self._lock:
+            self.search_index.index_ocr(receipt_id, self.load_ocr(receipt_id))
+            observed_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            if events.append_receipt_ocr_observed(
+                store=self.root,
+                receipt_id=receipt_id,
+                ocr_path=ocr_artifact_path,
+                ingested_at=observed_at,
+            ):
+                self.catalog.mark_ocr(receipt_id, observed_at)
+        if words:
+            self.write_ocr_words(receipt_id, lang=lang)
+        return ocr_artifact_path, page_count
+
+    def write_ocr_words(self, receipt_id: str, *, lang: str = "por") -> Path:
+        """Write word boxes for a receipt, from the image its OCR text was read from."""
+        words_path = self.ocr_words_path(receipt_id)
+        if not words_path.exists() and not self.ocr_path(receipt_id).exists():
+            # Text and words come from one pass when neither exists yet.
+            self.write_ocr(receipt_id, lang=lang, words=True)
+            return words_path
+        if not words_path.exists():
+            object_path = self._existing_object_path(receipt_id)
+            params = self.load_ocr(receipt_id).get("preprocess", {}).get("params")
+            if self.is_pdf(receipt_id):
+                pages = self.write_pdf_pages(receipt_id).get("observed", {}).get("pages", [])
+                _, engine_version, _, page_words = ocr.ocr_page_images(
+                    store=self.root, pages=pages, lang=lang, preprocess_params=params, words=True
+                )
+                self._write_ocr_words_observed(receipt_id, page_words, lang, engine_version)
+                ocr.discard_page_checkpoints(
+                    store=self.root, pages=pages, lang=lang, preprocess_params=params
+                )
+            else:
+                suffix = self._suffix(receipt_id)
+                if suffix not in ocr.SUPPORTED_IMAGE_EXTENSIONS:
+                    raise StoreError(f"Unsupported file type for OCR: {suffix}")
+                _, _, found = ocr.ocr_image(
+                    store=self.root,
+                    image_path=object_path,
+                    lang=lang,
+                    preprocess_params=params,
+                    source_sha256=self.load_manifest(receipt_id).get("content", {}).get("sha256"),
+                    words=True,
+                )
+                self._write_ocr_words_observed(
+                    receipt_id, [(1, found or [])], lang, ocr.tesseract_version()
+                )
+        with self._lock:
+            events.append_receipt_ocr_words_observed(
+                store=self.root,
+                receipt_id=receipt_id,
+                ocr_words_path=words_path,
+            )
+        return words_path
+
+    def _write_ocr_words_observed(
+        self,
+        receipt_id: str,
+        page_words: list[tuple[int, list[dict[str, Any]]]],
+        lang: str,
+        engine_version: str,
+    ) -> None:
+        from financial_data_lab.store import ocr_words
+
+        ocr_words.write_ocr_words_observed(
+            store=self.root,
+            receipt_id=receipt_id,
+            page_words=page_words,
+            lang=lang,
+            engine_version=engine_version,
+        )
+
+    def is_pdf(self, receipt_id: str) -> bool:
+        media_type = self.load_manifest(receipt_id).get("source", {}).get("media_type")
+        return media_type == "application/pdf" or self._suffix(receipt_id) == ".pdf"
+
+    def is_ocr_supported(self, receipt_id: str) -> bool:
+        return self.is_pdf(receipt_id) or self._suffix(receipt_id) in ocr.SUPPORTED_IMAGE_EXTENSIONS
+
+    def _suffix(self, receipt_id: str) -> str:
+        source = self.load_manifest(receipt_id).get("source", {})
+        original_name = source.get("original_filename") or self.object_path_for(receipt_id).name
+        return Path(original_name).suffix.lower()
+
+    def _existing_object_path(self, receipt_id: str) -> Path:
+        object_path = self.object_path_for(receipt_id)
+        if not object_path.exists():
+            raise StoreError(f"Missing object: {object_path}")
+        return object_path
@@ -0,0 +1,195 @@
+"""One-way replication between stores on local or mounted paths.
+
+Objects are immutable and named by their hash, so the stores only compare
+sorted hash lists, built from directory listings without reading or stat-ing
+objects, and copy the objects the target lacks. Source events are then read
+from the byte offset the last sync stopped at, as the projections do, and the
+receipts they name have their files copied. A receipt waits for a later sync
+until every object it references is in the target, so a corrupted object or a
+receipt ingested after the listing never leaves a manifest without its object.
+Events are merged by ``(receipt_id, type)``, checked against the target's
+projections, so each step of a receipt is recorded once on each side.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from financial_data_lab.core.jsoncanon import append_canonical_json_lines, write_canonical_json
+from financial_data_lab.store import artifacts, events, layout
+from financial_data_lab.store.store import Store, StoreError
+
+DEFAULT_WORKERS = 8
+
+
+def missing_hashes(source: list[str], target: list[str]) -> list[str]:
+    """Return the hashes in sorted ``source`` that are absent from sorted ``target``."""
+    missing: list[str] = []
+    position = 0
+    for sha256_hex in source:
+        while position < len(target) and target[position] < sha256_hex:
+            position += 1
+        if position == len(target) or target[position] != sha256_hex:
+            missing.append(sha256_hex)
+    return missing
+
+
+def _read_state(target: Path, source_key: str) -> dict[str, Any]:
+    path = layout.sync_state_path(target)
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+    return state.get(source_key, {"events_offset": 0, "events_head": None})
+
+
+def _write_state(target: Path, source_key: str, checkpoint: dict[str, Any]) -> None:
+    path = layout.sync_state_path(target)
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+    state[source_key] = checkpoint
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write_canonical_json(tmp_path, state)
+    os.replace(tmp_path, path)
+
+
+def _referenced_hashes(source: Path, receipt_id: str) -> list[str]:
+    # The objects a receipt's files point at: its content, rendered pages and words.
+    manifest = json.loads(layout.manifest_path(source, receipt_id).read_text(encoding="utf-8"))
+    hashes = [manifest["content"]["sha256"]]
+    pdf_pages_path = layout.pdf_pages_path(source, receipt_id)
+    if pdf_pages_path.exists():
+        pdf_pages = json.loads(pdf_pages_path.read_text(encoding="utf-8"))
+        hashes.extend(page["image"]["sha256"] for page in pdf_pages["observed"]["pages"])
+    ocr_words_path = layout.ocr_words_path(source, receipt_id)
+    if ocr_words_path.exists():
+        hashes.append(json.loads(ocr_words_path.read_text(encoding="utf-8"))["observed"]["sha256"])
+    return hashes
+
+
+def _is_ready(source: Path, target: Path, receipt_id: str) -> bool:
+    try:
+        hashes = _referenced_hashes(source, receipt_id)
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    return all(layout.object_path(target, sha256_hex).exists() for sha256_hex in hashes)
+
+
+def _copy_file(source_path: Path, target_path: Path) -> None:
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_path.with_name(f"{target_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.copyfile(source_path, tmp_path)
+    os.replace(tmp_path, target_path)
+
+
+def _copy_receipt_files(source: Path, target: Path, receipt_id: str) -> int:
+    source_dir = layout.receipt_dir(source, receipt_id)
+    target_dir = layout.receipt_dir(target, receipt_id)
+    names = sorted(path.name for path in source_dir.iterdir() if path.is_file())
+    # The manifest goes last, since it is what makes a receipt visible.
+    names.sort(key=lambda name: name == layout.MANIFEST_FILENAME)
+    copied = 0
+    for name in names:
+        if name.endswith(".tmp") or (target_dir / name).exists():
+            continue
+        _copy_file(source_dir / name, target_dir / name)
+        copied += 1
+    return copied
+
+
+def sync_stores(source: Path, target: Path, *, workers: int = DEFAULT_WORKERS) -> dict[str, Any]:
+    """Copy what ``target`` lacks from ``source``: objects, receipt files, then events."""
+    source, target = Path(source), Path(target)
+    if not source.exists():
+        raise StoreError(f"Store not found: {source}")
+    if source.resolve() == target.resolve():
+        raise StoreError("Source and target are the same store.")
+    if workers < 1:
+        raise StoreError("sync workers must be at least 1.")
+    if not layout.receipts_root(target).exists() and not layout.layout_marker_path(target).exists():
+        version = layout.read_layout(source).get("version", layout.LAYOUT_FLAT)
+        if version != layout.LAYOUT_FLAT:
+            layout.write_layout(target, version)
+
+    missing = missing_hashes(
+        list(layout.iter_object_hashes(source)), list(layout.iter_object_hashes(target))
+    )
+    errors: list[str] = []
+
+    def copy(sha256_hex: str) -> int:
+        source_path = layout.object_path(source, sha256_hex)
+        try:
+            artifacts.copy_object(source_path, target, sha256_hex)
+        except (OSError, ValueError) as exc:
+            errors.append(str(exc))
+            return 0
+        return source_path.stat().st_size
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        object_bytes = sum(executor.map(copy, missing))
+
+    source_key = str(source.resolve())
+    checkpoint = _read_state(target, source_key)
+    offset = checkpoint["events_offset"]
+    if events.is_log_replaced(source, offset, checkpoint["events_head"]):
+        offset = 0
+    pending = list(events.iter_events_from(source, offset))
+    pending_ids = sorted({event["receipt_id"] for _, event in pending if event.get("receipt_id")})
+    ready = {receipt_id: _is_ready(source, target, receipt_id) for receipt_id in pending_ids}
+
+    with Store(target) as handle:
+        handle.projections.update()
+        seen = handle.projections.event_keys([rid for rid in pending_ids if ready[rid]])
+        new_events: list[dict[str, Any]] = []
+        deferred: set[str] = set()
+        for end_offset, event in pending:
+            receipt_id = event.get("receipt_id")
+            if receipt_id and not ready[receipt_id]:
+                deferred.add(receipt_id)
+                continue
+            # The checkpoint stops before the first deferred event; events past
+            # it are merged now and skipped by the (receipt_id, type) check later.
+            if not deferred:
+                offset = end_offset
+            key = (receipt_id, event.get("type"))
+            if key not in seen:
+                seen.add(key)
+                new_events.append(event)
+
+        copied = {
+            receipt_id: _copy_receipt_files(source, target, receipt_id)
+            for receipt_id in pending_ids
+            if ready[receipt_id]
+        }
+        changed = {event["receipt_id"] for event in new_events if event.get("receipt_id")}
+        receipt_ids = sorted(changed | {receipt_id for receipt_id, count in copied.items() if count})
+        if new_events:
+            append_canonical_json_lines(layout.events_path(target), new_events)
+        for receipt_id in receipt_ids:
+            handle.catalog.upsert_manifest(handle.load_manifest(receipt_id))
+            if handle.ocr_path(receipt_id).exists():
+                handle.search_index.index_ocr(receipt_id, handle.load_ocr(receipt_id))
+        for event in new_events:
+            if event.get("type") == "receipt.ocr_observed":
+                handle.catalog.mark_ocr(event["receipt_id"], event.get("ts"))
+
+    _write_state(
+        target, source_key, {"events_offset": offset, "events_head": events.log_head(source)}
+    )
+    return {
+        "objects": len(missing) - len(errors),
+        "object_bytes": object_bytes,
+        "receipts": len(receipt_ids),
+        "files": sum(copied.values()),
+        "events": len(new_events),
+        "deferred": len(deferred),
+        "errors": sorted(errors),
+    }
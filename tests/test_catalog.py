@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.store import Store, layout
+from financial_data_lab.store.catalog import Catalog
+
+
+def _ingest(store_root: Path, path: Path, data: bytes) -> str:
+    path.write_bytes(data)
+    with Store(store_root) as store:
+        return store.ingest(path)[0]
+
+
+def test_catalog_filters(tmp_path: Path) -> None:
+    store_root = tmp_path / "store"
+    small_pdf = _ingest(store_root, tmp_path / "small.pdf", b"%PDF small")
+    large_pdf = _ingest(store_root, tmp_path / "statement.pdf", b"%PDF " + b"x" * 100)
+    image = _ingest(store_root, tmp_path / "photo.png", b"png" * 50)
+
+    with Catalog(store_root) as catalog:
+        assert catalog.receipt_ids(media_type="application/pdf") == sorted([small_pdf, large_pdf])
+        assert catalog.receipt_ids(media_type="application/pdf", min_size=50) == [large_pdf]
+        assert catalog.receipt_ids(filename="*.png") == [image]
+        assert catalog.receipt_ids(ingested_after="2000-01-01", ingested_before="2000-02-01") == []
+        assert len(catalog.receipt_ids(ocr_status="missing")) == 3
+
+
+def test_catalog_rebuild_from_manifests_and_events(tmp_path: Path) -> None:
+    store_root = tmp_path / "store"
+    receipt_id = _ingest(store_root, tmp_path / "a.png", b"png")
+    layout.catalog_path(store_root).unlink()
+    with layout.events_path(store_root).open("a", encoding="utf-8") as handle:
+        handle.write(
+            json.dumps({"type": "receipt.ocr_observed", "receipt_id": receipt_id, "ts": "2024-01-01T00:00:00Z"})
+            + "\n"
+        )
+
+    with Catalog(store_root) as catalog:
+        rows = catalog.query()
+    assert [(row["receipt_id"], row["ocr_status"], row["ocr_at"]) for row in rows] == [
+        (receipt_id, "observed", "2024-01-01T00:00:00Z")
+    ]
+
+
+def test_cli_query_and_filtered_export(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    store_root = tmp_path / "store"
+    pdf = _ingest(store_root, tmp_path / "a.pdf", b"%PDF")
+    _ingest(store_root, tmp_path / "b.png", b"png")
+    capsys.readouterr()
+
+    assert cli.main(["query", "--store", str(store_root), "--media-type", "application/pdf"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["receipt_id"] for line in lines] == [pdf]
+
+    out_path = tmp_path / "export.jsonl"
+    args = ["export", "receipts", "--store", str(store_root), "--out", str(out_path), "--filename", "*.pdf"]
+    assert cli.main(args) == 0
+    exported = out_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["receipt_id"] for line in exported] == [pdf]
+
+
+def test_catalog_rebuilds_after_interrupted_first_build(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store_root = tmp_path / "store"
+    receipt_id = _ingest(store_root, tmp_path / "a.png", b"png")
+    layout.catalog_path(store_root).unlink()
+
+    def interrupted(_self: Catalog, _manifest: dict[str, object]) -> None:
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Catalog, "_upsert_manifest", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            Catalog(store_root)
+    assert layout.catalog_path(store_root).exists()
+
+    with Catalog(store_root) as catalog:
+        assert catalog.receipt_ids() == [receipt_id]
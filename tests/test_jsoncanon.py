@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from financial_data_lab.core import jsoncanon
+
+CONFORMANCE_CASES: list[Any] = [
+    {},
+    [],
+    {"b": 1, "a": {"d": [3, 2, 1], "c": None}, "é": True, "z": False},
+    {"text": "Padaria São João — R$ 12,50", "emoji": "\U0001F9FE", "cjk": "收据"},
+    {"￿": 1, "\U0001F600": 2, "Z": 3, "a": 4, "": 5},
+    {"control": "\x00\x01\x1f\x7f  ", "quote": '"\\/', "tab": "\t\n\r\b\f"},
+    {"floats": [0.0, -0.0, 0.1, 1.0, 2.5, 100.0, 0.30000000000000004, 123456789.123, 1e15]},
+    {"exponent_floats": [1e16, 1e-05, 5e-324, 1.7976931348623157e308, 1e22, -1e-7]},
+    {"special_floats": [math.nan, math.inf, -math.inf]},
+    {"ints": [0, -1, 2**63 - 1, -(2**63), 2**64 - 1, 2**64, -(2**63) - 1, 10**30]},
+    {2: "int key", 1: "int key"},
+    {"tuple": (1, "two", 3.0)},
+    {"nested": [[[{"deep": [{"x": 1}]}]]]},
+    "plain string",
+    42,
+    None,
+]
+
+
+def _reference(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("backend", jsoncanon.available_backends())
+@pytest.mark.parametrize("obj", CONFORMANCE_CASES)
+def test_backend_is_byte_identical(backend: str, obj: Any) -> None:
+    previous = jsoncanon.get_backend()
+    jsoncanon.set_backend(backend)
+    try:
+        assert jsoncanon.canonical_json_dumps(obj).encode("utf-8") == _reference(obj).encode("utf-8")
+    finally:
+        jsoncanon.set_backend(previous)
+
+
+def test_unknown_backend_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        jsoncanon.set_backend("nope")
+
+
+def test_append_lines_matches_single_appends(tmp_path: Path) -> None:
+    records = [{"n": index, "text": f"línea {index}"} for index in range(5)]
+    batched = tmp_path / "batched.jsonl"
+    single = tmp_path / "single.jsonl"
+    assert jsoncanon.append_canonical_json_lines(batched, records) == 5
+    for record in records:
+        jsoncanon.append_canonical_json_line(single, record)
+    assert batched.read_bytes() == single.read_bytes()
+
+
+def test_unknown_backend_in_environment_falls_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    previous = jsoncanon.get_backend()
+    monkeypatch.setenv(jsoncanon.JSON_BACKEND_ENV, "nope")
+    try:
+        with pytest.warns(RuntimeWarning, match="Unknown JSON backend"):
+            name = jsoncanon.set_backend()
+        assert name in jsoncanon.available_backends()
+        assert jsoncanon.get_backend() == name
+    finally:
+        jsoncanon.set_backend(previous)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.store import Store, layout, migrate
+
+
+def _ingest_many(
+    tmp_path: Path, store_root: Path, count: int, *, legacy: bool = False
+) -> list[str]:
+    if legacy:
+        # A store from before the layout marker: receipts exist, no layout.v1.json.
+        layout.receipts_root(store_root).mkdir(parents=True)
+    store = Store(store_root)
+    receipt_ids = []
+    for index in range(count):
+        source = tmp_path / f"receipt{index}.txt"
+        source.write_text(f"receipt {index}", encoding="utf-8")
+        receipt_ids.append(store.ingest(source)[0])
+    return sorted(receipt_ids)
+
+
+def test_migrate_layout_resumable(tmp_path: Path) -> None:
+    store_root = tmp_path / "store"
+    receipt_ids = _ingest_many(tmp_path, store_root, 3, legacy=True)
+    assert not layout.layout_marker_path(store_root).exists()
+    assert layout.read_layout(store_root)["version"] == layout.LAYOUT_FLAT
+
+    moved, complete = migrate.migrate_layout(store_root, limit=1)
+    assert (moved, complete) == (1, False)
+    assert layout.read_layout(store_root)["migrating"] is True
+    assert sorted(layout.iter_receipt_ids(store_root)) == receipt_ids
+    for receipt_id in receipt_ids:
+        assert layout.manifest_path(store_root, receipt_id).exists()
+
+    moved, complete = migrate.migrate_layout(store_root)
+    assert (moved, complete) == (2, True)
+    assert layout.read_layout(store_root) == {
+        "schema": layout.LAYOUT_SCHEMA,
+        "version": layout.LAYOUT_SHARDED,
+        "migrating": False,
+    }
+    for receipt_id in receipt_ids:
+        manifest_path = layout.manifest_path(store_root, receipt_id)
+        assert manifest_path.parent == layout.sharded_receipt_dir(store_root, receipt_id)
+        assert manifest_path.exists()
+        assert not layout.flat_receipt_dir(store_root, receipt_id).exists()
+    assert Store(store_root).receipt_ids() == receipt_ids
+
+
+def test_new_store_starts_sharded(tmp_path: Path) -> None:
+    store_root = tmp_path / "store"
+    (receipt_id,) = _ingest_many(tmp_path, store_root, 1)
+    assert layout.read_layout(store_root)["version"] == layout.LAYOUT_SHARDED
+    manifest_path = layout.manifest_path(store_root, receipt_id)
+    assert manifest_path.parent == layout.sharded_receipt_dir(store_root, receipt_id)
+    assert migrate.migrate_layout(store_root) == (0, True)
+
+
+def test_ingest_and_export_after_migration(tmp_path: Path) -> None:
+    store_root = tmp_path / "store"
+    assert cli.main(["migrate-layout", "--store", str(store_root), "--quiet"]) == 0
+    receipt_ids = _ingest_many(tmp_path, store_root, 2)
+    for receipt_id in receipt_ids:
+        key = receipt_id.removeprefix("rcpt_")
+        assert (store_root / "receipts" / key[:2] / key[2:4] / receipt_id / "manifest.v1.json").exists()
+
+    assert cli.main(["verify", "--store", str(store_root)]) == 0
+    assert cli.main(["export", "receipts", "--store", str(store_root)]) == 0
+    lines = layout.receipts_export_path(store_root).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["receipt_id"] for line in lines] == receipt_ids
+
+
+def test_migrate_layout_merges_late_flat_writes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store_root = tmp_path / "store"
+    receipt_ids = _ingest_many(tmp_path, store_root, 2, legacy=True)
+    move = migrate._move_receipt_dir
+
+    def move_then_write(source: Path, target: Path) -> None:
+        move(source, target)
+        if source.name == receipt_ids[0] and not (target / "ocr.v1.json").exists():
+            # A writer that resolved the flat directory before it moved.
+            source.mkdir(parents=True)
+            (source / "ocr.v1.json").write_text("{}\n", encoding="utf-8")
+
+    monkeypatch.setattr(migrate, "_move_receipt_dir", move_then_write)
+    assert migrate.migrate_layout(store_root) == (3, True)
+    assert layout.ocr_path(store_root, receipt_ids[0]).read_text(encoding="utf-8") == "{}\n"
+    assert not layout.flat_receipt_dir(store_root, receipt_ids[0]).exists()
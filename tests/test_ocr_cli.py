@@ -106,3 +106,48 @@ def test_ocr_image_success(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> N
     lines = events_path.read_text(encoding="utf-8").strip().splitlines()
     event_types = [json.loads(line)["type"] for line in lines]
     assert "receipt.ocr_observed" in event_types
+
+
+def test_ocr_pdf_resumes_from_page_checkpoints(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    pytesseract = pytest.importorskip("pytesseract")
+
+    store = tmp_path / "store"
+    pdf_path = tmp_path / "statement.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\\n%EOF\\n")
+    receipt_id = _ingest(pdf_path, store)
+
+    def fake_render(_path: Path) -> tuple[str, list[bytes]]:
+        pages = []
+        for shade in (255, 128, 0):
+            buffer = io.BytesIO()
+            Image.new("RGB", (2, 2), color=(shade, shade, shade)).save(buffer, format="PNG")
+            pages.append(buffer.getvalue())
+        return "1.2.3", pages
+
+    calls: list[int] = []
+
+    def flaky_ocr(image: object, **_kwargs: object) -> str:
+        calls.append(1)
+        if len(calls) == 3:
+            raise MemoryError("killed on page 3")
+        return f"text {len(calls)}"
+
+    monkeypatch.setattr("financial_data_lab.store.pdf_pages._render_pdf_pages", fake_render)
+    monkeypatch.setattr(pytesseract, "image_to_string", flaky_ocr)
+    monkeypatch.setattr(pytesseract, "get_tesseract_version", lambda: "9.9.9")
+
+    with pytest.raises(MemoryError):
+        cli.main(["ocr", receipt_id, "--store", str(store)])
+    assert not layout.ocr_path(store, receipt_id).exists()
+    assert len(list(layout.checkpoints_root(store).rglob("*.json"))) == 2
+
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda *_args, **_kwargs: "text 3")
+    assert cli.main(["ocr", receipt_id, "--store", str(store)]) == 0
+
+    payload = json.loads(layout.ocr_path(store, receipt_id).read_text(encoding="utf-8"))
+    assert [page["text"] for page in payload["observed"]["pages"]] == ["text 1", "text 2", "text 3"]
+    assert payload["observed"]["text"] == "text 1\n\n---\n\ntext 2\n\n---\n\ntext 3"
+    assert list(layout.checkpoints_root(store).rglob("*.json")) == []
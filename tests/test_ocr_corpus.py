@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.core.jsoncanon import write_canonical_json
+from financial_data_lab.store import events, layout
+from financial_data_lab.store.ocr_corpus import (
+    INDEX_FILENAME,
+    RECORD_DTYPE,
+    TEXT_FILENAME,
+    OcrCorpus,
+    update_ocr_corpus,
+)
+
+
+def _observe(store: Path, receipt_id: str, observed: dict[str, object]) -> None:
+    path = layout.ocr_path(store, receipt_id)
+    write_canonical_json(path, {"receipt_id": receipt_id, "observed": observed})
+    events.append_receipt_ocr_observed(store=store, receipt_id=receipt_id, ocr_path=path)
+
+
+def test_ocr_corpus_appends_new_ocr_events(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    _observe(store, "rcpt_aaaaaaaaaaaaaaaa", {"text": "padaria são joão"})
+    report = update_ocr_corpus(store)
+    assert (report["added"], report["records"]) == (1, 1)
+
+    _observe(
+        store,
+        "rcpt_bbbbbbbbbbbbbbbb",
+        {"text": "", "pages": [{"page": 1, "text": "página um"}, {"page": 2, "text": "total 9,90"}]},
+    )
+    events.append_receipt_ocr_observed(
+        store=store, receipt_id="rcpt_missing", ocr_path=tmp_path / "missing.json"
+    )
+    report = update_ocr_corpus(store)
+    assert (report["added"], report["skipped"], report["records"]) == (2, 1, 3)
+    assert update_ocr_corpus(store)["added"] == 0
+
+    corpus = OcrCorpus.open(layout.exports_root(store))
+    assert len(corpus) == 3
+    assert [corpus.text(position) for position in range(3)] == [
+        "padaria são joão",
+        "página um",
+        "total 9,90",
+    ]
+    assert corpus.positions("rcpt_bbbbbbbbbbbbbbbb", page=2).tolist() == [2]
+    assert corpus.index["page"].tolist() == [0, 1, 2]
+    text_size = (layout.exports_root(store) / TEXT_FILENAME).stat().st_size
+    assert text_size == report["text_bytes"] == int(corpus.index["start"][-1] + corpus.index["length"][-1])
+
+
+def test_ocr_corpus_discards_unfinished_append(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    out_dir = tmp_path / "corpus"
+    _observe(store, "rcpt_aaaaaaaaaaaaaaaa", {"text": "first"})
+    update_ocr_corpus(store, out_dir)
+    with (out_dir / TEXT_FILENAME).open("ab") as handle:
+        handle.write(b"partial")
+    with (out_dir / INDEX_FILENAME).open("ab") as handle:
+        handle.write(b"\0" * RECORD_DTYPE.itemsize)
+
+    _observe(store, "rcpt_bbbbbbbbbbbbbbbb", {"text": "second"})
+    update_ocr_corpus(store, out_dir)
+    corpus = OcrCorpus.open(out_dir)
+    assert [corpus.text(position) for position in range(len(corpus))] == ["first", "second"]
+
+    assert update_ocr_corpus(store, out_dir, rebuild=True)["added"] == 2
+    assert (out_dir / TEXT_FILENAME).read_text(encoding="utf-8") == "firstsecond"
+
+
+def test_cli_export_ocr(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    store = tmp_path / "store"
+    _observe(store, "rcpt_aaaaaaaaaaaaaaaa", {"text": "mercado"})
+
+    assert cli.main(["export", "ocr", "--store", str(store)]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "status: ok added: 1 skipped: 0 records: 1 text_bytes: 7"
+    assert out[2].endswith(INDEX_FILENAME)
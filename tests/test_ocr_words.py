@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from financial_data_lab import cli  # noqa: E402
+from financial_data_lab.store import Store  # noqa: E402
+from financial_data_lab.store.ocr_words import OcrWords, encode_words  # noqa: E402
+
+
+def _word(page: int, left: int, top: int, conf: float, text: str) -> dict[str, object]:
+    return {
+        "page": page,
+        "line": 0,
+        "left": left,
+        "top": top,
+        "width": 40,
+        "height": 10,
+        "conf": conf,
+        "text": text,
+    }
+
+
+WORDS = [
+    _word(2, 300, 900, 41.5, "TOTAL"),
+    _word(1, 10, 10, 96.0, "Padaria"),
+    _word(2, 360, 900, 88.0, "R$ 12,50"),
+    _word(2, 10, 50, 12.0, "São"),
+]
+
+
+def test_encode_roundtrip_and_queries(tmp_path: Path) -> None:
+    path = tmp_path / "words.fdlw"
+    path.write_bytes(encode_words(WORDS))
+    words = OcrWords.open(path)
+
+    assert len(words) == 4
+    assert words.page.tolist() == [1, 2, 2, 2]
+    assert words.text(3) == "São"
+    assert words.page_range(2) == (1, 4)
+
+    region = words.in_region(2, 290, 880, 420, 920)
+    assert [record["text"] for record in words.records(region)] == ["TOTAL", "R$ 12,50"]
+    contained = words.in_region(2, 290, 880, 380, 920, contained=True)
+    assert [record["text"] for record in words.records(contained)] == ["TOTAL"]
+    assert words.in_region(1, 290, 880, 420, 920).tolist() == []
+
+    lowest = words.lowest_confidence(2)
+    assert [record["text"] for record in words.records(lowest)] == ["São", "TOTAL"]
+    assert words.records(words.lowest_confidence(1, words.indices(1)))[0]["conf"] == 96.0
+
+
+def test_ocr_words_cli(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    pytesseract = pytest.importorskip("pytesseract")
+
+    store = tmp_path / "store"
+    image_path = tmp_path / "receipt.png"
+    Image.new("RGB", (4, 4), color=(255, 255, 255)).save(image_path)
+    with Store(store) as handle:
+        receipt_id = handle.ingest(image_path)[0]
+
+    data = {
+        "level": [4, 5, 5],
+        "block_num": [1, 1, 1],
+        "par_num": [1, 1, 1],
+        "line_num": [1, 1, 1],
+        "left": [0, 5, 60],
+        "top": [0, 100, 100],
+        "width": [100, 40, 30],
+        "height": [20, 12, 12],
+        "conf": [-1, 95.5, 30.25],
+        "text": ["", "TOTAL", "9,90"],
+    }
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda *_args, **_kwargs: "TOTAL 9,90")
+    monkeypatch.setattr(pytesseract, "image_to_data", lambda *_args, **_kwargs: data)
+    monkeypatch.setattr(pytesseract, "get_tesseract_version", lambda: "9.9.9")
+
+    assert cli.main(["ocr", receipt_id, "--store", str(store), "--words"]) == 0
+    assert "ocr_words_path:" in capsys.readouterr().out
+
+    region_args = ["--page", "1", "--region", "50,90,200,120"]
+    assert cli.main(["words", receipt_id, "--store", str(store), *region_args]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["text"] for line in lines] == ["9,90"]
+
+    assert cli.main(["words", receipt_id, "--store", str(store), "--lowest", "1"]) == 0
+    (line,) = capsys.readouterr().out.splitlines()
+    record = json.loads(line)
+    assert (record["text"], record["conf"], record["left"], record["page"]) == ("9,90", 30.25, 60, 1)
+
+
+def test_ocr_words_single_pass_on_preprocessed_image(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    pytesseract = pytest.importorskip("pytesseract")
+
+    store = tmp_path / "store"
+    image_path = tmp_path / "receipt.png"
+    Image.new("RGB", (8, 8), color=(200, 40, 40)).save(image_path)
+    with Store(store) as handle:
+        receipt_id = handle.ingest(image_path)[0]
+
+    data = {
+        "level": [5, 5],
+        "block_num": [1, 1],
+        "par_num": [1, 1],
+        "line_num": [1, 1],
+        "left": [5, 60],
+        "top": [100, 100],
+        "width": [40, 30],
+        "height": [12, 12],
+        "conf": [95.5, 30.25],
+        "text": ["TOTAL", "9,90"],
+    }
+    modes: list[str] = []
+
+    def image_to_string(*_args: object, **_kwargs: object) -> str:
+        raise AssertionError("text must come from the image_to_data pass")
+
+    def image_to_data(image: object, **_kwargs: object) -> dict[str, list[object]]:
+        modes.append(image.mode)  # type: ignore[attr-defined]
+        return data
+
+    monkeypatch.setattr(pytesseract, "image_to_string", image_to_string)
+    monkeypatch.setattr(pytesseract, "image_to_data", image_to_data)
+    monkeypatch.setattr(pytesseract, "get_tesseract_version", lambda: "9.9.9")
+
+    args = ["ocr", receipt_id, "--store", str(store), "--words", "--preprocess"]
+    assert cli.main(args) == 0
+    assert "ocr_words_path:" in capsys.readouterr().out
+    assert len(modes) == 1 and modes[0] != "RGB"
+
+    with Store(store) as handle:
+        payload = handle.load_ocr(receipt_id)
+        assert payload["observed"]["text"] == "TOTAL 9,90"
+        assert payload["preprocess"]["params"] is not None
+        assert len(handle.load_ocr_words(receipt_id)) == 2
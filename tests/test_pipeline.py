@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import io
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.store import Store, StoreError, layout, pipeline
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch: pytest.MonkeyPatch) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    pytesseract = pytest.importorskip("pytesseract")
+
+    def fake_render(_path: Path) -> tuple[str, list[bytes]]:
+        pages = []
+        for color in ((255, 255, 255), (0, 0, 0)):
+            buffer = io.BytesIO()
+            Image.new("RGB", (2, 2), color=color).save(buffer, format="PNG")
+            pages.append(buffer.getvalue())
+        return "1.2.3", pages
+
+    monkeypatch.setattr("financial_data_lab.store.pdf_pages._render_pdf_pages", fake_render)
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda *_args, **_kwargs: "mercado total")
+    monkeypatch.setattr(pytesseract, "get_tesseract_version", lambda: "9.9.9")
+
+
+def _inputs(root: Path) -> Path:
+    from PIL import Image
+
+    inbox = root / "inbox"
+    (inbox / "nested").mkdir(parents=True)
+    for index in range(4):
+        Image.new("RGB", (4, 4), color=(index * 40, 0, 0)).save(inbox / f"r{index}.png")
+    (inbox / "nested" / "copy.png").write_bytes((inbox / "r0.png").read_bytes())
+    (inbox / "nested" / "receipt.pdf").write_bytes(b"%PDF-1.4\n%EOF\n")
+    (inbox / "notes.txt").write_text("not a receipt image", encoding="utf-8")
+    return inbox
+
+
+def test_pipeline_ingests_renders_and_ocrs(tmp_path: Path, fake_ocr: None) -> None:
+    inbox = _inputs(tmp_path)
+    with Store(tmp_path / "store") as handle:
+        report = pipeline.run_pipeline(
+            handle, [inbox], ingest_workers=3, render_workers=2, ocr_workers=2, queue_size=1
+        )
+        stages = {stage["stage"]: stage for stage in report["stages"]}
+        assert report["errors"] == []
+        assert (stages["ingest"]["processed"], stages["ingest"]["skipped"]) == (6, 1)
+        assert (stages["render"]["processed"], stages["render"]["skipped"]) == (1, 5)
+        assert (stages["ocr"]["processed"], stages["ocr"]["skipped"]) == (5, 1)
+        assert all(stage["queue_max_depth"] <= 1 for stage in report["stages"])
+
+        receipt_ids = handle.receipt_ids()
+        assert len(receipt_ids) == 6
+        assert handle.catalog.receipt_ids(ocr_status="observed") == [
+            receipt_id for receipt_id in receipt_ids if handle.is_ocr_supported(receipt_id)
+        ]
+        assert len(handle.search_index.search("mercado")) == 5
+
+    lines = layout.events_path(tmp_path / "store").read_text(encoding="utf-8").splitlines()
+    counts = Counter((event["receipt_id"], event["type"]) for event in map(json.loads, lines))
+    assert set(counts.values()) == {1}
+    assert Counter(event_type for _, event_type in counts) == {
+        "receipt.ingested": 6,
+        "receipt.pdf_pages_observed": 1,
+        "receipt.ocr_observed": 5,
+    }
+
+
+def test_pipeline_collects_failures(
+    tmp_path: Path, fake_ocr: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    inbox = _inputs(tmp_path)
+
+    def broken_render(_path: Path) -> tuple[str, list[bytes]]:
+        raise RuntimeError("cannot open PDF")
+
+    monkeypatch.setattr("financial_data_lab.store.pdf_pages._render_pdf_pages", broken_render)
+    with Store(tmp_path / "store") as handle:
+        report = pipeline.run_pipeline(handle, [inbox])
+    assert [(error["stage"], error["error"]) for error in report["errors"]] == [
+        ("render", "cannot open PDF")
+    ]
+    assert report["stages"][2]["processed"] == 4
+
+
+def test_pipeline_finishes_when_listing_inputs_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "a.txt"
+    source.write_text("receipt", encoding="utf-8")
+
+    def broken_listing(inputs: list[Path]) -> Iterator[Path]:
+        yield from inputs
+        raise PermissionError("cannot list inbox")
+
+    monkeypatch.setattr(pipeline, "iter_input_files", broken_listing)
+    with Store(tmp_path / "store") as handle:
+        report = pipeline.run_pipeline(handle, [source])
+    assert report["errors"] == [{"stage": "feed", "item": str(source), "error": "cannot list inbox"}]
+    assert report["stages"][0]["processed"] == 1
+
+
+def test_pipeline_rejects_missing_input(tmp_path: Path) -> None:
+    with Store(tmp_path / "store") as handle, pytest.raises(StoreError, match="Input not found"):
+        pipeline.run_pipeline(handle, [tmp_path / "missing"])
+
+
+def test_cli_pipeline_run(
+    tmp_path: Path, fake_ocr: None, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inbox = _inputs(tmp_path)
+    store = tmp_path / "store"
+
+    assert cli.main(["pipeline", "run", str(inbox), "--store", str(store), "--ocr-workers", "3"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert [line.split()[1] for line in out[:3]] == ["ingest", "render", "ocr"]
+    assert "workers: 3 processed: 5" in out[2]
+    assert out[-1].startswith("status: ok")
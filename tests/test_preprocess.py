@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+pytesseract = pytest.importorskip("pytesseract")
+
+from financial_data_lab import cli  # noqa: E402
+from financial_data_lab.core import imageprep  # noqa: E402
+from financial_data_lab.store import Store, layout  # noqa: E402
+from financial_data_lab.store.preprocess import resolve_params  # noqa: E402
+
+
+def _text_lines(height: int = 400, width: int = 300) -> np.ndarray:
+    page = np.full((height, width), 255.0, dtype=np.float32)
+    for top in range(40, height - 40, 24):
+        page[top : top + 6, 30 : width - 30] = 0.0
+    return page
+
+
+def test_estimate_skew_recovers_rotation() -> None:
+    page = _text_lines()
+    skewed = imageprep.rotate(page, -2.0)
+    assert imageprep.estimate_skew(page, 5.0) == 0.0
+    assert imageprep.estimate_skew(skewed, 5.0) == pytest.approx(2.0, abs=0.25)
+
+
+def test_preprocess_crops_background_and_binarizes() -> None:
+    photo = np.full((600, 500, 3), 60, dtype=np.uint8)
+    photo[100:500, 100:400] = _text_lines()[..., None].astype(np.uint8)
+    params = resolve_params({"deskew": False, "max_side": 0})
+
+    processed = imageprep.preprocess(photo, params)
+    assert processed.shape[0] < 400 and processed.shape[1] < 300
+    assert set(np.unique(processed).tolist()) <= {0, 255}
+    assert imageprep.downscale(np.ones((10, 9)), 2).shape == (5, 4)
+
+
+def test_preprocess_keeps_blank_page() -> None:
+    blank = np.full((120, 80, 3), 255, dtype=np.uint8)
+    assert imageprep.otsu_threshold(blank[..., 0]) == -1.0
+    processed = imageprep.preprocess(blank, resolve_params({"max_side": 0}))
+    assert processed.shape == (120, 80)
+    assert set(np.unique(processed).tolist()) == {255}
+
+
+def test_resolve_params_rejects_unknown_keys() -> None:
+    with pytest.raises(ValueError, match="Unknown preprocess parameter"):
+        resolve_params({"sharpen": True})
+    with pytest.raises(ValueError, match="Invalid value for preprocess parameter window"):
+        resolve_params({"window": "abc"})
+    with pytest.raises(ValueError, match="Invalid value for preprocess parameter crop"):
+        resolve_params({"crop": 1})
+    assert resolve_params({"max_skew_degrees": 3})["max_skew_degrees"] == 3
+
+
+def test_ocr_with_preprocess_records_derived_object(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = tmp_path / "store"
+    image_path = tmp_path / "receipt.png"
+    Image.fromarray(_text_lines().astype(np.uint8)).save(image_path)
+    with Store(store) as handle:
+        receipt_id = handle.ingest(image_path)[0]
+
+    seen_sizes = []
+
+    def fake_ocr(image: "Image.Image", **_kwargs: object) -> str:
+        seen_sizes.append(image.size)
+        return "preprocessed text"
+
+    monkeypatch.setattr(pytesseract, "image_to_string", fake_ocr)
+    monkeypatch.setattr(pytesseract, "get_tesseract_version", lambda: "9.9.9")
+
+    args = ["ocr", receipt_id, "--store", str(store), "--preprocess-opt", "window=15"]
+    assert cli.main(args) == 0
+
+    payload = json.loads(layout.ocr_path(store, receipt_id).read_text(encoding="utf-8"))
+    assert payload["observed"]["text"] == "preprocessed text"
+    assert payload["preprocess"]["params"]["window"] == 15
+    (output,) = payload["preprocess"]["outputs"]
+    assert output["page"] is None
+    assert (store / output["object_path"]).exists()
+    assert seen_sizes[0][0] < 300
+    (record_path,) = layout.derived_root(store).rglob("*.json")
+
+    # A truncated record is recomputed, and the new text reaches the search index.
+    record_path.write_text("{", encoding="utf-8")
+    layout.ocr_path(store, receipt_id).unlink()
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda *_args, **_kwargs: "second pass")
+    with Store(store) as handle:
+        assert handle.search_index.search("second") == []
+        handle.write_ocr(receipt_id, preprocess={"window": 15})
+        assert [hit["receipt_id"] for hit in handle.search_index.search("second")] == [receipt_id]
+    assert json.loads(record_path.read_text(encoding="utf-8"))["params"]["window"] == 15
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.core.jsoncanon import append_canonical_json_line
+from financial_data_lab.store import Store, layout
+from financial_data_lab.store.projections import Projections
+
+
+def _event(receipt_id: str, event_type: str, ts: str) -> dict[str, str]:
+    return {"receipt_id": receipt_id, "ts": ts, "type": event_type}
+
+
+def _append(store: Path, *events: dict[str, str]) -> None:
+    for event in events:
+        append_canonical_json_line(layout.events_path(store), event)
+
+
+def test_projections_apply_only_new_events(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    _append(
+        store,
+        _event("rcpt_a", "receipt.ingested", "2024-05-01T10:00:00Z"),
+        _event("rcpt_b", "receipt.ingested", "2024-05-01T11:00:00Z"),
+        _event("rcpt_b", "receipt.pdf_pages_observed", "2024-05-02T09:00:00Z"),
+    )
+    with Projections(store) as views:
+        assert views.update() == 3
+        assert views.update() == 0
+        assert views.status_counts() == {"ingested": 1, "paged": 1, "ocr_observed": 0}
+
+        _append(store, _event("rcpt_b", "receipt.ocr_observed", "2024-05-02T09:05:00Z"))
+        with layout.events_path(store).open("a", encoding="utf-8") as handle:
+            handle.write('{"receipt_id":"rcpt_c","ts":"2024-05-0')
+        assert views.update() == 1
+        assert views.offset < layout.events_path(store).stat().st_size
+        assert [row["receipt_id"] for row in views.receipts("ocr_observed")] == ["rcpt_b"]
+        assert views.receipts("ingested")[0] == {
+            "receipt_id": "rcpt_a",
+            "status": "ingested",
+            "ingested_at": "2024-05-01T10:00:00Z",
+            "pdf_pages_at": None,
+            "ocr_at": None,
+            "ocr_words_at": None,
+        }
+        assert views.event_counts() == [
+            {"type": "receipt.ingested", "day": "2024-05-01", "count": 2},
+            {"type": "receipt.ocr_observed", "day": "2024-05-02", "count": 1},
+            {"type": "receipt.pdf_pages_observed", "day": "2024-05-02", "count": 1},
+        ]
+
+
+def test_projections_rebuild_when_log_is_replaced(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    _append(
+        store,
+        _event("rcpt_a", "receipt.ingested", "2024-05-01T10:00:00Z"),
+        _event("rcpt_a", "receipt.ocr_observed", "2024-05-01T10:05:00Z"),
+    )
+    with Projections(store) as views:
+        views.update()
+        layout.events_path(store).unlink()
+        _append(store, _event("rcpt_z", "receipt.ingested", "2024-06-01T00:00:00Z"))
+        assert views.update() == 1
+        assert [row["receipt_id"] for row in views.receipts()] == ["rcpt_z"]
+
+        incremental = views.receipts()
+        assert views.rebuild() == 1
+        assert views.receipts() == incremental
+
+
+def test_cli_status(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    store = tmp_path / "store"
+    source = tmp_path / "a.txt"
+    source.write_text("a", encoding="utf-8")
+    receipt_id = Store(store).ingest(source)[0]
+
+    assert cli.main(["status", "--store", str(store)]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["applied"] == 1
+    assert summary["receipts"] == {"ingested": 1, "paged": 0, "ocr_observed": 0}
+
+    assert cli.main(["status", "--store", str(store), "--list", "ingested"]) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row["receipt_id"] for row in rows] == [receipt_id]
+
+    assert cli.main(["status", "--store", str(store), "--rebuild"]) == 0
+    assert json.loads(capsys.readouterr().out)["applied"] == 1
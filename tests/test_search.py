@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.core.hashing import receipt_id_from_sha256, sha256_bytes
+from financial_data_lab.store import Store, layout, manifests, ocr
+from financial_data_lab.store.search import SearchIndex, match_expression
+
+
+def _write_ocr(store: Path, name: str, pages: list[str]) -> str:
+    source = store.parent / f"{name}.png"
+    source.write_text(name, encoding="utf-8")
+    sha256_hex = sha256_bytes(name.encode("utf-8"))
+    manifests.write_manifest(
+        store=store,
+        sha256_hex=sha256_hex,
+        source_path=source,
+        path_hint=source.name,
+        original_filename=source.name,
+        object_path=source,
+        ingested_at="2024-01-01T00:00:00Z",
+    )
+    receipt_id = receipt_id_from_sha256(sha256_hex)
+    ocr.write_ocr_observed(
+        store=store,
+        receipt_id=receipt_id,
+        object_path=store / "objects" / receipt_id,
+        text=ocr.join_page_texts([{"text": text} for text in pages]),
+        pages=[{"page": index, "text": text} for index, text in enumerate(pages, start=1)],
+        engine_version="9.9.9",
+        created_at="2024-01-01T00:00:00Z",
+    )
+    return receipt_id
+
+
+def test_match_expression_quotes_terms() -> None:
+    assert match_expression('12.345.678/0001-90 "acme') == '"12.345.678/0001-90" """acme"'
+
+
+def test_search_ranks_receipts_with_page_hits(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    rcpt_a = _write_ocr(store, "a", ["Padaria São João", "CNPJ 12.345.678/0001-90 total"])
+    rcpt_b = _write_ocr(store, "b", ["Mercado Central padaria padaria padaria"])
+
+    with SearchIndex(store) as index:
+        results = index.search("padaria")
+        assert [result["receipt_id"] for result in results] == [rcpt_b, rcpt_a]
+        assert results[1]["hits"][0]["page"] == 1
+        assert results[1]["hits"][0]["snippet"].startswith("[Padaria]")
+
+        tax_hits = index.search("12.345.678/0001-90")
+        assert [(r["receipt_id"], [h["page"] for h in r["hits"]]) for r in tax_hits] == [(rcpt_a, [2])]
+        assert [r["receipt_id"] for r in index.search("sao joao")] == [rcpt_a]
+
+        index.index_ocr(rcpt_b, {"observed": {"text": "Farmacia"}})
+        assert [r["receipt_id"] for r in index.search("padaria")] == [rcpt_a]
+        hits = index.search("farmacia")[0]["hits"]
+        assert [(hit["page"], hit["snippet"]) for hit in hits] == [(None, "[Farmacia]")]
+
+
+def test_search_limit_keeps_best_receipts_with_all_their_hits(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    rcpt_a = _write_ocr(store, "a", ["Padaria", "padaria padaria padaria"])
+    rcpt_b = _write_ocr(store, "b", ["Padaria São João e mais outras palavras"])
+    rcpt_c = _write_ocr(store, "c", ["padaria padaria"])
+
+    with SearchIndex(store) as index:
+        full = index.search("padaria")
+        assert [result["receipt_id"] for result in full] == [rcpt_a, rcpt_c, rcpt_b]
+        assert index.search("padaria", limit=2) == full[:2]
+        (best,) = index.search("padaria", limit=1)
+        assert best["receipt_id"] == rcpt_a
+        assert [hit["page"] for hit in best["hits"]] == [2, 1]
+        assert best["score"] == best["hits"][0]["score"]
+        assert index.search("padaria", limit=0) == []
+
+
+def test_cli_search(tmp_path: Path, capsys: object) -> None:
+    store = tmp_path / "store"
+    receipt_id = _write_ocr(store, "a", ["Posto Shell"])
+    assert cli.main(["search", "shell", "--store", str(store)]) == 0
+    out = capsys.readouterr().out  # type: ignore[attr-defined]
+    assert f'"receipt_id":"{receipt_id}"' in out
+
+
+def test_ocr_updates_an_open_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    pytesseract = pytest.importorskip("pytesseract")
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda *_args, **_kwargs: "Posto Ipiranga")
+    monkeypatch.setattr(pytesseract, "get_tesseract_version", lambda: "9.9.9")
+    store = tmp_path / "store"
+    image_path = tmp_path / "receipt.png"
+    Image.new("RGB", (4, 4), color=(255, 255, 255)).save(image_path)
+    receipt_id = Store(store).ingest(image_path)[0]
+
+    with SearchIndex(store) as index:
+        assert index.search("ipiranga") == []
+        assert cli.main(["ocr", receipt_id, "--store", str(store)]) == 0
+        assert [r["receipt_id"] for r in index.search("ipiranga")] == [receipt_id]
+
+
+def test_search_index_rebuilds_after_interrupted_first_build(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = tmp_path / "store"
+    receipt_id = _write_ocr(store, "a", ["Posto Shell"])
+
+    def interrupted(_self: SearchIndex, _receipt_id: str, _payload: dict[str, object]) -> None:
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(SearchIndex, "_index_ocr", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            SearchIndex(store)
+    assert layout.search_index_path(store).exists()
+
+    with SearchIndex(store) as index:
+        assert [r["receipt_id"] for r in index.search("shell")] == [receipt_id]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from financial_data_lab import cli  # noqa: E402
+from financial_data_lab.core.perceptual import hamming_distances  # noqa: E402
+from financial_data_lab.store import Store  # noqa: E402
+from financial_data_lab.store.catalog import Catalog  # noqa: E402
+from financial_data_lab.store.similarity import SimilarityIndex  # noqa: E402
+
+
+def _receipt_image(seed: int) -> "Image.Image":
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 256, size=(8, 6), dtype=np.uint8)
+    return Image.fromarray(np.kron(blocks, np.ones((40, 40), dtype=np.uint8))).convert("RGB")
+
+
+def test_lookup_matches_brute_force() -> None:
+    rng = np.random.default_rng(7)
+    phashes = rng.integers(0, 2**63, size=2000, dtype=np.uint64)
+    query = int(phashes[10])
+    near = np.uint64(query ^ 0b1011 ^ (1 << 40) ^ (1 << 62))
+    phashes = np.append(phashes, near)
+    index = SimilarityIndex.empty()
+    index.add([f"rcpt_{i}" for i in range(len(phashes))], [0] * len(phashes), phashes, phashes)
+
+    found = dict(index.lookup(query, max_distance=8))
+    expected = np.flatnonzero(hamming_distances(phashes, query) <= 8).tolist()
+    assert sorted(found) == expected
+    assert found[len(phashes) - 1] == 5
+
+
+def test_dupes_cli_finds_rescanned_receipt(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    store = tmp_path / "store"
+    original = tmp_path / "scan1.png"
+    rescan = tmp_path / "scan2.jpg"
+    other = tmp_path / "other.png"
+    _receipt_image(1).save(original)
+    _receipt_image(1).resize((230, 310)).save(rescan, quality=70)
+    _receipt_image(2).save(other)
+
+    with Store(store) as handle:
+        original_id = handle.ingest(original)[0]
+        handle.ingest(other)
+    assert cli.main(["ingest", str(rescan), "--store", str(store), "--warn-dupes"]) == 0
+    captured = capsys.readouterr()
+    warnings = captured.err.splitlines()
+    assert len(warnings) == 1
+    assert warnings[0].startswith(f"warning: possible duplicate of {original_id} (page 0, distance ")
+
+    assert cli.main(["dupes", "--store", str(store)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    match = json.loads(lines[0])
+    assert original_id in (match["receipt_id"], match["duplicate_of"])
+    assert (match["page"], match["duplicate_page"]) == (0, 0)
+
+
+def test_warn_dupes_hashes_only_the_new_receipt(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = tmp_path / "store"
+    original = tmp_path / "scan1.png"
+    rescan = tmp_path / "scan2.jpg"
+    _receipt_image(1).save(original)
+    _receipt_image(1).resize((230, 310)).save(rescan, quality=70)
+    with Store(store) as handle:
+        original_id = handle.ingest(original)[0]
+    assert cli.main(["dupes", "--store", str(store)]) == 0
+    capsys.readouterr()
+
+    def fail(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("catalog scanned")
+
+    monkeypatch.setattr(Catalog, "query", fail)
+    assert cli.main(["ingest", str(rescan), "--store", str(store), "--warn-dupes"]) == 0
+    assert capsys.readouterr().err.startswith(f"warning: possible duplicate of {original_id} ")
+
+
+def test_unreadable_image_is_reported_once(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    store = tmp_path / "store"
+    fake = tmp_path / "a.png"
+    fake.write_text("not an image", encoding="utf-8")
+    image = tmp_path / "b.png"
+    _receipt_image(3).save(image)
+    with Store(store) as handle:
+        handle.ingest(image)
+
+    assert cli.main(["ingest", str(fake), "--store", str(store), "--warn-dupes"]) == 0
+    captured = capsys.readouterr()
+    assert captured.out.startswith("receipt_id: ")
+    fake_id = captured.out.split()[1]
+
+    assert cli.main(["dupes", "--store", str(store)]) == 0
+    assert capsys.readouterr().err == ""
+    index = SimilarityIndex.load(store)
+    assert index.unreadable.tolist() == [fake_id]
+    assert fake_id not in index.receipt_ids.tolist() and len(index) == 1
+
+
+def test_dupes_warns_about_unreadable_images(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    store = tmp_path / "store"
+    fake = tmp_path / "a.png"
+    fake.write_text("not an image", encoding="utf-8")
+    with Store(store) as handle:
+        fake_id = handle.ingest(fake)[0]
+
+    assert cli.main(["dupes", "--store", str(store)]) == 0
+    assert capsys.readouterr().err.startswith(f"warning: cannot hash {fake_id} (page 0): ")
+    assert cli.main(["dupes", "--store", str(store)]) == 0
+    assert capsys.readouterr().err == ""
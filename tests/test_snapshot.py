@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.store import Store, StoreError, layout, snapshot
+
+
+def _ingest_many(store: Path, tmp_path: Path, names: list[str]) -> list[str]:
+    receipt_ids = []
+    with Store(store) as handle:
+        for name in names:
+            source = tmp_path / name
+            source.write_text(f"receipt {name}", encoding="utf-8")
+            receipt_ids.append(handle.ingest(source)[0])
+    return receipt_ids
+
+
+def test_snapshot_diff_walks_only_changed_subtrees(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = tmp_path / "store"
+    receipt_ids = _ingest_many(store, tmp_path, [f"r{index}.txt" for index in range(40)])
+    record = snapshot.take_snapshot(store)
+    assert record["counts"] == {"objects": 40, "manifests": 40, "events": 40}
+    assert snapshot.diff_snapshot(store, record["root"][:12]) == []
+    assert snapshot.take_snapshot(store)["root"] == record["root"]
+
+    new_id = _ingest_many(store, tmp_path, ["new.txt"])[0]
+    new_sha = Store(store).load_manifest(new_id)["content"]["sha256"]
+    manifest_path = layout.manifest_path(store, receipt_ids[0])
+    manifest_path.write_text(manifest_path.read_text(encoding="utf-8") + " ", encoding="utf-8")
+    removed_path = Store(store).object_path_for(receipt_ids[1])
+    removed_path.unlink()
+
+    loaded: list[str] = []
+    load_node = snapshot.load_node
+    monkeypatch.setattr(
+        snapshot, "load_node", lambda root, node: loaded.append(node) or load_node(root, node)
+    )
+    changes = snapshot.diff_snapshot(store, record["root"])
+    found = sorted((change["section"], change["name"], change["change"]) for change in changes)
+    assert found == sorted(
+        [
+            ("events", "00000000", "changed"),
+            ("manifests", new_id, "added"),
+            ("manifests", receipt_ids[0], "changed"),
+            ("objects", new_sha, "added"),
+            ("objects", removed_path.name, "removed"),
+        ]
+    )
+    assert len(loaded) < 15
+
+
+def test_snapshot_detects_tampered_objects_and_caches_hashes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = tmp_path / "store"
+    monkeypatch.setattr(snapshot, "EVENT_CHUNK_LINES", 4)
+    receipt_ids = _ingest_many(store, tmp_path, [f"r{index}.txt" for index in range(10)])
+    root = snapshot.take_snapshot(store)["root"]
+
+    hashed: list[Path] = []
+    sha256_file = snapshot.sha256_file
+    monkeypatch.setattr(
+        snapshot, "sha256_file", lambda path: hashed.append(path) or sha256_file(path)
+    )
+    assert snapshot.diff_snapshot(store, root, use_cache=True) == []
+    assert hashed == []
+
+    tampered = Store(store).object_path_for(receipt_ids[0])
+    tampered.write_text("tampered", encoding="utf-8")
+    _ingest_many(store, tmp_path, ["late.txt"])
+    changes = snapshot.diff_snapshot(store, root, use_cache=True)
+    assert {"section": "objects", "name": tampered.name, "change": "changed"} in changes
+    # Only the last, partial event chunk changes; the complete ones come from the cache.
+    assert [change["name"] for change in changes if change["section"] == "events"] == ["00000002"]
+    assert tampered in hashed and len(hashed) == 3
+
+    cached_tree, _ = snapshot.build_tree(store, use_cache=True)
+    assert len(snapshot._load_hash_cache(store)["events"]["chunks"]) == 2
+    layout.snapshot_hash_cache_path(store).unlink()
+    assert snapshot.build_tree(store)[0] == cached_tree
+
+
+def test_snapshot_diff_rehashes_objects_by_default(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    store = tmp_path / "store"
+    receipt_id = _ingest_many(store, tmp_path, ["a.txt"])[0]
+    root = snapshot.take_snapshot(store)["root"]
+
+    # Same size, mtime put back: only a full rehash sees the edit.
+    object_path = Store(store).object_path_for(receipt_id)
+    stat = object_path.stat()
+    object_path.write_bytes(b"X" * stat.st_size)
+    os.utime(object_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert snapshot.diff_snapshot(store, root, use_cache=True) == []
+    assert snapshot.diff_snapshot(store, root) == [
+        {"section": "objects", "name": object_path.name, "change": "changed"}
+    ]
+    capsys.readouterr()
+    assert cli.main(["diff", root, "--store", str(store)]) == 1
+    assert '"change":"changed"' in capsys.readouterr().out
+
+
+def test_snapshot_resolve_errors(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    with pytest.raises(StoreError, match="Unknown snapshot"):
+        snapshot.diff_snapshot(store, "abc")
+    root = snapshot.take_snapshot(store)["root"]
+    layout.snapshot_node_path(store, root).unlink()
+    with pytest.raises(StoreError, match="Snapshot node not found"):
+        _ingest_many(store, tmp_path, ["a.txt"])
+        snapshot.diff_snapshot(store, root)
+
+
+def test_cli_snapshot_and_diff(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    store = tmp_path / "store"
+    _ingest_many(store, tmp_path, ["a.txt"])
+
+    assert cli.main(["snapshot", "--store", str(store)]) == 0
+    out = capsys.readouterr().out
+    assert out.endswith("objects: 1 manifests: 1 events: 1\n")
+    root = out.split()[1]
+
+    assert cli.main(["diff", root, "--store", str(store)]) == 0
+    assert capsys.readouterr().out == "Store matches snapshot.\n"
+    _ingest_many(store, tmp_path, ["b.txt"])
+    assert cli.main(["diff", root, "--store", str(store)]) == 1
+    assert len(capsys.readouterr().out.splitlines()) == 3
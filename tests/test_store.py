@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.store import Store, StoreError
+
+
+def _write(path: Path, text: str) -> Path:
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_store_manifest_cache(tmp_path: Path) -> None:
+    store = Store(tmp_path / "store", cache_size=2)
+    receipt_ids = [
+        store.ingest(_write(tmp_path / f"r{index}.txt", f"receipt {index}"))[0]
+        for index in range(3)
+    ]
+
+    first = store.load_manifest(receipt_ids[0])
+    assert store.load_manifest(receipt_ids[0]) is first
+    assert store._documents.hits == 1
+
+    store.load_manifests(receipt_ids)
+    assert len(store._documents) == 2
+    assert store.load_manifest(receipt_ids[0]) is not first
+
+
+def test_store_batch_and_object_resolution(tmp_path: Path) -> None:
+    store = Store(tmp_path / "store")
+    receipt_id, object_path, _ = store.ingest(_write(tmp_path / "a.txt", "a"))
+
+    assert store.object_paths_for([receipt_id, "rcpt_missing"]) == {receipt_id: object_path}
+    assert list(store.load_manifests([receipt_id, "rcpt_missing"])) == [receipt_id]
+    assert store.check_object(receipt_id) == (True, True)
+    assert store.verify() == []
+
+    object_path.write_text("tampered", encoding="utf-8")
+    assert store.check_object(receipt_id) == (True, False)
+    assert len(store.verify()) == 1
+
+
+def test_store_missing_manifest_raises(tmp_path: Path) -> None:
+    store = Store(tmp_path / "store")
+    with pytest.raises(StoreError, match="Manifest not found"):
+        store.load_manifest("rcpt_missing")
+
+
+def test_cli_show_prints_manifest(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    store_root = tmp_path / "store"
+    receipt_id, _, manifest_path = Store(store_root).ingest(_write(tmp_path / "a.txt", "a"))
+    capsys.readouterr()
+
+    assert cli.main(["show", receipt_id, "--store", str(store_root)]) == 0
+    out = capsys.readouterr().out
+    assert out.startswith(manifest_path.read_text(encoding="utf-8"))
+    assert out.endswith("status: ok object_exists: true hash_match: true\n")
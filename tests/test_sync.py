@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from financial_data_lab import cli
+from financial_data_lab.core.jsoncanon import write_canonical_json
+from financial_data_lab.store import Store, StoreError, artifacts, events, layout
+from financial_data_lab.store.sync import missing_hashes, sync_stores
+
+
+def _ingest(store: Path, tmp_path: Path, name: str) -> str:
+    source = tmp_path / name
+    source.write_text(f"receipt {name}", encoding="utf-8")
+    return Store(store).ingest(source)[0]
+
+
+def _event_keys(store: Path) -> Counter[tuple[str, str]]:
+    lines = layout.events_path(store).read_text(encoding="utf-8").splitlines()
+    return Counter((event["receipt_id"], event["type"]) for event in map(json.loads, lines))
+
+
+def test_missing_hashes() -> None:
+    assert missing_hashes(["a1", "b2", "c3", "d4"], ["b2", "c3", "e5"]) == ["a1", "d4"]
+    assert missing_hashes(["a1"], []) == ["a1"]
+
+
+def test_sync_copies_only_missing_content(tmp_path: Path) -> None:
+    primary, replica = tmp_path / "primary", tmp_path / "replica"
+    first = _ingest(primary, tmp_path, "a.txt")
+    report = sync_stores(primary, replica)
+    assert (report["objects"], report["receipts"], report["events"]) == (1, 1, 1)
+    assert Store(replica).verify() == []
+
+    second = _ingest(primary, tmp_path, "b.txt")
+    ocr_payload = {"observed": {"text": "padaria central"}, "receipt_id": first}
+    write_canonical_json(layout.ocr_path(primary, first), ocr_payload)
+    events.append_receipt_ocr_observed(
+        store=primary, receipt_id=first, ocr_path=layout.ocr_path(primary, first)
+    )
+    report = sync_stores(primary, replica, workers=2)
+    assert (report["objects"], report["receipts"], report["files"], report["events"]) == (1, 2, 2, 2)
+
+    assert sync_stores(primary, replica)["objects"] == 0
+    assert set(_event_keys(replica).values()) == {1}
+    assert sorted(_event_keys(replica)) == sorted(_event_keys(primary))
+    with Store(replica) as handle:
+        assert handle.receipt_ids() == sorted([first, second])
+        assert handle.catalog.receipt_ids(ocr_status="observed") == [first]
+        assert [result["receipt_id"] for result in handle.search_index.search("padaria")] == [first]
+
+
+def test_sync_merges_in_both_directions(tmp_path: Path) -> None:
+    left, right = tmp_path / "left", tmp_path / "right"
+    shared = tmp_path / "shared.txt"
+    shared.write_text("shared", encoding="utf-8")
+    Store(left).ingest(shared)
+    Store(right).ingest(shared)
+    _ingest(left, tmp_path, "l.txt")
+    _ingest(right, tmp_path, "r.txt")
+
+    sync_stores(left, right)
+    sync_stores(right, left)
+    assert Store(left).receipt_ids() == Store(right).receipt_ids()
+    assert len(Store(left).receipt_ids()) == 3
+    for store in (left, right):
+        assert set(_event_keys(store).values()) == {1}
+
+
+def test_sync_rejects_corrupted_object(tmp_path: Path) -> None:
+    primary, replica = tmp_path / "primary", tmp_path / "replica"
+    receipt_id = _ingest(primary, tmp_path, "a.txt")
+    Store(primary).object_path_for(receipt_id).write_text("tampered", encoding="utf-8")
+
+    report = sync_stores(primary, replica)
+    assert report["objects"] == 0
+    assert len(report["errors"]) == 1 and "Hash mismatch" in report["errors"][0]
+    assert (report["receipts"], report["events"], report["deferred"]) == (0, 0, 1)
+    assert list(layout.iter_object_hashes(replica)) == []
+    assert not layout.manifest_path(replica, receipt_id).exists()
+    assert not layout.events_path(replica).exists()
+
+
+def test_sync_defers_receipts_ingested_after_listing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    primary, replica = tmp_path / "primary", tmp_path / "replica"
+    first = _ingest(primary, tmp_path, "a.txt")
+    copy_object = artifacts.copy_object
+    late: list[str] = []
+
+    def copy_then_ingest(source_path: Path, store: Path, sha256_hex: str) -> None:
+        copy_object(source_path, store, sha256_hex)
+        if not late:
+            late.append(_ingest(primary, tmp_path, "late.txt"))
+
+    monkeypatch.setattr(artifacts, "copy_object", copy_then_ingest)
+    report = sync_stores(primary, replica)
+    assert (report["receipts"], report["events"], report["deferred"]) == (1, 1, 1)
+    assert Store(replica).receipt_ids() == [first]
+    assert Store(replica).verify() == []
+
+    report = sync_stores(primary, replica)
+    assert (report["objects"], report["receipts"], report["events"], report["deferred"]) == (1, 1, 1, 0)
+    assert Store(replica).receipt_ids() == sorted([first, late[0]])
+    assert set(_event_keys(replica).values()) == {1}
+
+
+def test_sync_reads_only_new_source_events(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    primary, replica = tmp_path / "primary", tmp_path / "replica"
+    _ingest(primary, tmp_path, "a.txt")
+    sync_stores(primary, replica)
+    offsets: list[int] = []
+    iter_events_from = events.iter_events_from
+
+    def recording_iter(store: Path, offset: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+        if store == primary:
+            offsets.append(offset)
+        return iter_events_from(store, offset)
+
+    monkeypatch.setattr(events, "iter_events_from", recording_iter)
+    second = _ingest(primary, tmp_path, "b.txt")
+    report = sync_stores(primary, replica)
+    assert offsets == [len(layout.events_path(primary).read_bytes().splitlines()[0]) + 1]
+    assert (report["receipts"], report["events"]) == (1, 1)
+    assert second in Store(replica).receipt_ids()
+
+
+def test_sync_keeps_sharded_layout(tmp_path: Path) -> None:
+    primary, replica = tmp_path / "primary", tmp_path / "replica"
+    layout.write_layout(primary, layout.LAYOUT_SHARDED)
+    receipt_id = _ingest(primary, tmp_path, "a.txt")
+    sync_stores(primary, replica)
+    assert layout.manifest_path(replica, receipt_id).parent == layout.sharded_receipt_dir(
+        replica, receipt_id
+    )
+    with pytest.raises(StoreError, match="same store"):
+        sync_stores(primary, primary)
+
+
+def test_cli_sync(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    primary, replica = tmp_path / "primary", tmp_path / "replica"
+    _ingest(primary, tmp_path, "a.txt")
+    capsys.readouterr()
+
+    assert cli.main(["sync", "--from", str(primary), "--to", str(replica)]) == 0
+    assert capsys.readouterr().out.startswith("status: ok objects: 1 ")
+    assert cli.main(["sync", "--from", str(tmp_path / "missing"), "--to", str(replica)]) == 1
+    assert "Store not found" in capsys.readouterr().err
+    args = ["sync", "--from", str(primary), "--to", str(replica), "--workers", "0"]
+    assert cli.main(args) == 1
+    assert "workers must be at least 1" in capsys.readouterr().err